@@ -0,0 +1,183 @@
+"""
+Asynchronous client for the Meta Ads Library API.
+"""
+import asyncio
+from src.utils.config import (
+    API_BASE_URL, HTTP_TIMEOUT, ASYNC_MAX_CONCURRENCY, PAGE_SIZE_ADAPTIVE, PAGE_SIZE_INITIAL
+)
+from src.api.auth import AuthManager
+from src.api.client import build_search_params
+from src.api.decoding import JSONDecoder
+from src.api.errors import APIError
+from src.api.page_size import PageSizeController, set_limit
+from src.api.rate_limit import RateController
+from src.api.retry import RetryPolicy
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+class AsyncAPIClient:
+    """
+    Asyncio-based client for the Meta Ads Library API.
+    
+    Many searches can run on one event loop: each search paginates
+    sequentially, while a semaphore bounds the number of requests in
+    flight across all of them.
+    """
+    
+    def __init__(self, auth_manager=None, max_concurrency=ASYNC_MAX_CONCURRENCY, rate_controller=None,
+                 retry_policy=None, adaptive_page_size=PAGE_SIZE_ADAPTIVE, decoder=None):
+        """
+        Initialize the client.
+        
+        Args:
+            auth_manager (AuthManager): Provides the API token
+            max_concurrency (int): Maximum number of requests in flight
+            rate_controller (RateController): Shared request pacing (default: a new one)
+            retry_policy (RetryPolicy): Retry behaviour for failed requests
+            adaptive_page_size (bool): Tune the limit of each search's page requests
+            decoder (JSONDecoder): Decoder of response bodies (default: the JSON_DECODER backend)
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncAPIClient requires the 'aiohttp' package")
+        
+        self.auth_manager = auth_manager or AuthManager()
+        self.max_concurrency = max_concurrency
+        self.rate_controller = rate_controller or RateController()
+        self.retry_policy = retry_policy or RetryPolicy(
+            transient_exceptions=(aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+        )
+        self.adaptive_page_size = adaptive_page_size
+        self.decoder = decoder or JSONDecoder()
+        self._session = None
+        self._semaphore = None
+    
+    async def __aenter__(self):
+        """Open the HTTP session."""
+        self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the HTTP session."""
+        await self.close()
+    
+    async def close(self):
+        """Close the underlying HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _get_session(self):
+        """Create the HTTP session and semaphore on first use inside the event loop."""
+        if self._session is None:
+            connect_timeout, read_timeout = HTTP_TIMEOUT
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+    
+    async def search_ads(self, params=None, max_pages=None):
+        """
+        Search for ads using the provided parameters.
+        
+        Args:
+            params (dict): Search parameters to override defaults
+            max_pages (int): Maximum number of pages to retrieve (None for all)
+            
+        Returns:
+            list: List of ad data
+        """
+        results = []
+        async for page in self.iter_pages(params, max_pages):
+            results.extend(page)
+        return results
+    
+    async def search_many(self, params_list, max_pages=None):
+        """
+        Run several searches concurrently on the current event loop.
+        
+        Args:
+            params_list (list): Search parameter dicts, one per search
+            max_pages (int): Maximum number of pages per search (None for all)
+            
+        Returns:
+            list: One list of ad data per search, in the order given
+        """
+        return await asyncio.gather(
+            *(self.search_ads(params, max_pages) for params in params_list)
+        )
+    
+    async def iter_pages(self, params=None, max_pages=None):
+        """
+        Iterate over result pages as they arrive from the API.
+        
+        Args:
+            params (dict): Search parameters to override defaults
+            max_pages (int): Maximum number of pages to retrieve (None for all)
+            
+        Yields:
+            list: Ad data contained in a single page
+        """
+        search_params = build_search_params(params, self.auth_manager.get_token())
+        session = self._get_session()
+        page_size = PageSizeController(initial=int(search_params.get('limit') or PAGE_SIZE_INITIAL)) \
+            if self.adaptive_page_size else None
+        
+        # Initialize pagination
+        next_url = API_BASE_URL
+        page_count = 0
+        attempt = 0
+        
+        while next_url and (max_pages is None or page_count < max_pages):
+            # Wait for our turn in the shared rate budget
+            wait_time = self.rate_controller.reserve()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            
+            try:
+                async with self._semaphore:
+                    # For pagination, the URL already includes parameters
+                    url, request_params = next_url, (search_params if next_url == API_BASE_URL else None)
+                    if page_size is not None:
+                        if request_params is not None:
+                            request_params = dict(request_params, limit=page_size.limit)
+                        else:
+                            url = set_limit(url, page_size.limit)
+                    async with session.get(url, params=request_params) as response:
+                        self.rate_controller.update_from_headers(response.headers)
+                        data = await self._parse_response(response)
+                
+            except Exception as e:
+                # Retry the same URL so pagination resumes from the last good page
+                retry = self.retry_policy.on_page_error(e, attempt, page_size, self.rate_controller)
+                if retry is None:
+                    raise
+                attempt, delay = retry
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                continue
+            
+            # Update pagination
+            attempt = 0
+            if page_size is not None:
+                page_size.on_success()
+            next_url = data.get('paging', {}).get('next')
+            page_count += 1
+            
+            yield data.get('data', [])
+    
+    async def _parse_response(self, response):
+        """Decode a response, raising APIError for error responses."""
+        body = await response.read()
+        if response.status == 200:
+            return self.decoder.decode_page(body)
+        
+        try:
+            payload = self.decoder.decode(body)
+        except ValueError:
+            payload = {}
+        raise APIError.from_response(response.status, payload, response.headers)
@@ -1,15 +1,16 @@
 """
 Authentication module for Meta Ads Library API.
 """
-import requests
-from src.utils.config import API_BASE_URL
+from src.utils.config import API_BASE_URL, HTTP_TIMEOUT
+from src.api.session import create_session
 
 class AuthManager:
     """Manages authentication for the Meta Ads Library API."""
     
-    def __init__(self, token=None):
-        """Initialize with optional token."""
+    def __init__(self, token=None, session=None):
+        """Initialize with optional token and HTTP session."""
         self.token = token
+        self.session = session or create_session()
         
     def set_token(self, token):
         """Set the API token."""
@@ -36,7 +37,7 @@ class AuthManager:
                 'ad_reached_countries': '["US"]'
             }
             
-            response = requests.get(API_BASE_URL, params=params)
+            response = self.session.get(API_BASE_URL, params=params, timeout=HTTP_TIMEOUT)
             
             # Check if response is successful
             if response.status_code == 200:
@@ -0,0 +1,161 @@
+"""
+On-disk cache for Meta Ads Library API pages.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from src.utils.config import CACHE_DIR, CACHE_TTL, CACHE_MAX_BYTES
+from src.api.decoding import loads
+
+class ResponseCache:
+    """
+    Content-addressed cache of decoded API pages.
+    
+    Entries are keyed on the normalized request (URL, parameters and paging
+    cursor, without the access token), expire after a TTL and are evicted
+    least recently used first once the cache grows past its size budget.
+    """
+    
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory (str): Directory holding the cached pages
+            ttl (float): Seconds a cached page stays valid
+            max_bytes (int): Size budget of the cache directory
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+    
+    @staticmethod
+    def make_key(url, params=None):
+        """
+        Build the cache key of a request.
+        
+        Args:
+            url (str): Request URL, possibly including a query string
+            params (dict): Extra query parameters
+            
+        Returns:
+            str: Hex digest identifying the request
+        """
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        if params:
+            query.update({k: str(v) for k, v in params.items()})
+        query.pop('access_token', None)
+        
+        normalized = json.dumps(
+            [parts.netloc, parts.path, sorted(query.items())],
+            separators=(',', ':')
+        )
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """
+        Get a cached page.
+        
+        Args:
+            key (str): Cache key
+            
+        Returns:
+            dict: Decoded page, or None if missing or expired
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = loads(f.read())
+        except (OSError, ValueError):
+            return None
+        
+        if time.time() - entry.get('created', 0) > self.ttl:
+            self._remove(path)
+            return None
+        
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get('data')
+    
+    def set(self, key, data):
+        """
+        Store a page and evict old entries if the cache is over budget.
+        
+        Args:
+            key (str): Cache key
+            data (dict): Decoded page
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.time(), 'data': data}, f, separators=(',', ':'))
+        size = os.path.getsize(tmp_path)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size - previous_size
+            if self._size > self.max_bytes:
+                self._evict()
+    
+    def clear(self):
+        """Remove every cached page."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._remove(path)
+            self._size = 0
+    
+    def _evict(self):
+        """Delete least recently used entries until the cache fits its budget."""
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        for path, _, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            if self._remove(path):
+                self._size -= size
+    
+    def _entries(self):
+        """List cached files as (path, last used time, size) tuples."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+    
+    def _scan_size(self):
+        """Compute the total size of the cache directory."""
+        return sum(size for _, _, size in self._entries())
+    
+    def _remove(self, path):
+        """Delete a cache file, ignoring files already gone."""
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+    
+    def _path(self, key):
+        """Get the file path of a cache key."""
+        return os.path.join(self.directory, key[:2], f"{key}.json")
@@ -0,0 +1,162 @@
+"""
+On-disk pagination checkpoints for resumable searches.
+"""
+import os
+import json
+import uuid
+import hashlib
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from src.utils.config import CHECKPOINT_DIR
+
+def params_hash(params):
+    """
+    Hash search parameters, ignoring the access token.
+    
+    Args:
+        params (dict): Search parameters
+        
+    Returns:
+        str: Hex digest identifying the search
+    """
+    relevant = {k: v for k, v in params.items() if k != 'access_token'}
+    encoded = json.dumps(relevant, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def strip_access_token(url):
+    """Remove the access token from a paging URL before it is written to disk."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'access_token']
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def add_access_token(url, token):
+    """Put the access token back into a stored paging URL."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query.append(('access_token', token))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+class CheckpointStore:
+    """Stores the pagination cursor of running searches as JSON files."""
+    
+    def __init__(self, directory=CHECKPOINT_DIR):
+        """
+        Initialize the store.
+        
+        Args:
+            directory (str): Directory holding one checkpoint file per job
+        """
+        self.directory = directory
+    
+    @staticmethod
+    def new_job_id():
+        """Generate a unique job identifier."""
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    
+    def save(self, job_id, params, next_url, page_count, ad_count, page_sizes=None):
+        """
+        Persist the state of a search after a page was consumed.
+        
+        Args:
+            job_id (str): Job identifier
+            params (dict): Search parameters (the access token is not stored)
+            next_url (str): Paging URL of the next page, or None when finished
+            page_count (int): Pages fetched so far
+            ad_count (int): Ads fetched so far
+            page_sizes (dict): Page size stats of the search, see PageSizeController.stats()
+        """
+        stored_params = {k: v for k, v in params.items() if k != 'access_token'}
+        checkpoint = {
+            'job_id': job_id,
+            'params': stored_params,
+            'params_hash': params_hash(stored_params),
+            'next_url': strip_access_token(next_url) if next_url else None,
+            'page_count': page_count,
+            'ad_count': ad_count,
+            'completed': next_url is None,
+            'page_sizes': page_sizes,
+            'updated_at': datetime.now().isoformat()
+        }
+        self._write(job_id, checkpoint)
+    
+    def complete(self, job_id, page_count, ad_count):
+        """
+        Mark a job finished before the end of its results.
+        
+        Used when the caller stops on its own, e.g. at a result limit: the
+        last page may have been cut short, so the job cannot be resumed
+        from the next page without losing ads.
+        
+        Args:
+            job_id (str): Job identifier
+            page_count (int): Pages consumed by the job
+            ad_count (int): Ads consumed by the job
+        """
+        checkpoint = self.load(job_id)
+        if checkpoint is None:
+            return
+        checkpoint.update({
+            'next_url': None,
+            'page_count': page_count,
+            'ad_count': ad_count,
+            'completed': True,
+            'updated_at': datetime.now().isoformat()
+        })
+        self._write(job_id, checkpoint)
+    
+    def load(self, job_id):
+        """
+        Load the checkpoint of a job.
+        
+        Args:
+            job_id (str): Job identifier
+            
+        Returns:
+            dict: Checkpoint data, or None if the job is unknown
+        """
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+    
+    def delete(self, job_id):
+        """Remove the checkpoint of a job."""
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
+    
+    def list_jobs(self):
+        """
+        List the jobs that have a checkpoint.
+        
+        Returns:
+            list: Checkpoint data of every stored job, most recent first
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        
+        jobs = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                checkpoint = self.load(name[:-len('.json')])
+                if checkpoint:
+                    jobs.append(checkpoint)
+        return sorted(jobs, key=lambda job: job.get('updated_at', ''), reverse=True)
+    
+    def _write(self, job_id, checkpoint):
+        """Store a checkpoint, replacing the previous one."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a partial checkpoint
+        path = self._path(job_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, path)
+    
+    def _path(self, job_id):
+        """Get the checkpoint file path of a job."""
+        if not job_id or os.sep in job_id or job_id.startswith('.'):
+            raise ValueError(f"Invalid job id: {job_id!r}")
+        return os.path.join(self.directory, f"{job_id}.json")
@@ -1,119 +1,373 @@
 """
 Client for interacting with the Meta Ads Library API.
 """
-import time
 import json
-import requests
-from src.utils.config import API_BASE_URL, DEFAULT_SEARCH_PARAMS
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.utils.config import (
+    API_BASE_URL, DEFAULT_SEARCH_PARAMS, HTTP_TIMEOUT, SHARD_DAYS, SHARD_MAX_WORKERS, CACHE_ENABLED,
+    PAGE_SIZE_ADAPTIVE, PAGE_SIZE_INITIAL
+)
 from src.api.auth import AuthManager
+from src.api.cache import ResponseCache
+from src.api.decoding import JSONDecoder
+from src.api.checkpoint import CheckpointStore, add_access_token, strip_access_token, params_hash
+from src.api.errors import APIError
+from src.api.page_size import PageSizeController, set_limit
+from src.api.rate_limit import RateController
+from src.api.retry import RetryPolicy
+from src.api.sharding import build_shards
+
+def build_search_params(params, token):
+    """
+    Merge search parameters with the defaults and encode them for the API.
+    
+    Args:
+        params (dict): Search parameters to override defaults
+        token (str): API access token
+        
+    Returns:
+        dict: Request parameters including the access token
+    """
+    if not token:
+        raise ValueError("API token is required")
+    
+    # Merge default params with provided params
+    search_params = DEFAULT_SEARCH_PARAMS.copy()
+    if params:
+        search_params.update(params)
+    
+    # Ensure access_token is included
+    search_params['access_token'] = token
+    
+    # Convert list parameters to JSON strings
+    for key, value in search_params.items():
+        if isinstance(value, list):
+            search_params[key] = json.dumps(value)
+    
+    return search_params
+
+def _rewrite_paging(data, rewrite):
+    """Return a shallow copy of a page with its paging links rewritten."""
+    paging = data.get('paging')
+    if not paging:
+        return data
+    paging = dict(paging)
+    for link in ('next', 'previous'):
+        if paging.get(link):
+            paging[link] = rewrite(paging[link])
+    return {**data, 'paging': paging}
 
 class APIClient:
     """Client for the Meta Ads Library API."""
     
-    def __init__(self, auth_manager=None):
-        """Initialize with an optional auth manager."""
+    def __init__(self, auth_manager=None, session=None, rate_controller=None, retry_policy=None,
+                 checkpoint_store=None, cache=None, adaptive_page_size=PAGE_SIZE_ADAPTIVE, decoder=None):
+        """
+        Initialize with an optional auth manager, HTTP session, rate controller,
+        retry policy, checkpoint store, response cache and JSON decoder.
+        
+        When no session is given, the auth manager's session is shared so
+        searches and token validation reuse the same connection pool. When no
+        cache is given, pages are cached on disk if CACHE_ENABLED is set.
+        With adaptive_page_size, every search tunes the limit of its page
+        requests with a PageSizeController. When no decoder is given, responses
+        are decoded with the JSON_DECODER backend.
+        """
         self.auth_manager = auth_manager or AuthManager()
-        self.rate_limit_remaining = None
-        self.rate_limit_reset = None
+        self.session = session or self.auth_manager.session
+        self.rate_controller = rate_controller or RateController()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.checkpoint_store = checkpoint_store or CheckpointStore()
+        self.cache = cache or (ResponseCache() if CACHE_ENABLED else None)
+        self.adaptive_page_size = adaptive_page_size
+        self.decoder = decoder or JSONDecoder()
         
     def set_auth_manager(self, auth_manager):
         """Set the authentication manager."""
         self.auth_manager = auth_manager
         
-    def search_ads(self, params=None, max_pages=None):
+    def search_ads(self, params=None, max_pages=None, job_id=None, use_cache=True):
         """
         Search for ads using the provided parameters.
         
         Args:
             params (dict): Search parameters to override defaults
             max_pages (int): Maximum number of pages to retrieve (None for all)
+            job_id (str): Checkpoint the search under this id so it can be resumed
+            use_cache (bool): Serve pages from the response cache when possible
             
         Returns:
             list: List of ad data
         """
-        if not self.auth_manager.get_token():
-            raise ValueError("API token is required")
+        return list(self.iter_ads(params, max_pages, job_id, use_cache))
+    
+    def iter_ads(self, params=None, max_pages=None, job_id=None, use_cache=True):
+        """
+        Iterate over ads one at a time as their pages are fetched.
         
-        # Merge default params with provided params
-        search_params = DEFAULT_SEARCH_PARAMS.copy()
-        if params:
-            search_params.update(params)
+        Args:
+            params (dict): Search parameters to override defaults
+            max_pages (int): Maximum number of pages to retrieve (None for all)
+            job_id (str): Checkpoint the search under this id so it can be resumed
+            use_cache (bool): Serve pages from the response cache when possible
+            
+        Yields:
+            dict: Ad data
+        """
+        for page in self.iter_pages(params, max_pages, job_id, use_cache):
+            yield from page
+    
+    def iter_pages(self, params=None, max_pages=None, job_id=None, use_cache=True, page_size=None,
+                   cancel_event=None):
+        """
+        Iterate over result pages as they arrive from the API.
         
-        # Ensure access_token is included
-        search_params['access_token'] = self.auth_manager.get_token()
+        Only the current page is held in memory, so callers can process or
+        export each page while the next one is being requested. When a job id
+        is given, the cursor is checkpointed after every page so the search
+        can be continued with resume().
         
-        # Convert list parameters to JSON strings
-        for key, value in search_params.items():
-            if isinstance(value, list):
-                search_params[key] = json.dumps(value)
+        Args:
+            params (dict): Search parameters to override defaults
+            max_pages (int): Maximum number of pages to retrieve (None for all)
+            job_id (str): Checkpoint the search under this id so it can be resumed
+            use_cache (bool): Serve pages from the response cache when possible
+            page_size (PageSizeController): Controller choosing the limit of each page
+                request, e.g. to read its stats afterwards (default: a new one if
+                adaptive_page_size is set)
+            cancel_event (threading.Event): Stop paginating once set, also while
+                waiting for the rate budget or a retry
+            
+        Returns:
+            generator: Yields the ad data contained in each page
+        """
+        search_params = self._build_search_params(params)
+        if page_size is None:
+            page_size = self.new_page_size(search_params.get('limit'))
+        if job_id:
+            self.checkpoint_store.save(job_id, search_params, API_BASE_URL, 0, 0,
+                                       page_sizes=page_size.stats() if page_size else None)
+        return self._paginate(search_params, API_BASE_URL, max_pages, job_id=job_id, use_cache=use_cache,
+                              page_size=page_size, cancel_event=cancel_event)
+    
+    def resume(self, job_id, max_pages=None, use_cache=True):
+        """
+        Continue a checkpointed search from its last consumed page.
+        
+        Args:
+            job_id (str): Id the search was started with
+            max_pages (int): Maximum number of pages for the whole job, including
+                pages fetched before the interruption (None for all)
+            use_cache (bool): Serve pages from the response cache when possible
+            
+        Returns:
+            generator: Yields the ad data of each remaining page
+        """
+        checkpoint = self.checkpoint_store.load(job_id)
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for job {job_id}")
+        
+        stored_params = checkpoint['params']
+        if params_hash(stored_params) != checkpoint.get('params_hash'):
+            raise ValueError(f"Checkpoint of job {job_id} does not match its search parameters")
         
-        # Initialize results and pagination
-        all_results = []
-        next_url = API_BASE_URL
-        page_count = 0
+        search_params = self._build_search_params(stored_params)
+        next_url = checkpoint.get('next_url')
+        if next_url and next_url != API_BASE_URL:
+            next_url = add_access_token(next_url, search_params['access_token'])
+        
+        # Continue with the page size the job had settled on
+        page_sizes = checkpoint.get('page_sizes') or {}
+        
+        return self._paginate(
+            search_params, next_url, max_pages,
+            page_count=checkpoint.get('page_count', 0),
+            ad_count=checkpoint.get('ad_count', 0),
+            job_id=job_id,
+            use_cache=use_cache,
+            page_size=self.new_page_size(page_sizes.get('limit') or search_params.get('limit'))
+        )
+    
+    def _paginate(self, search_params, next_url, max_pages, page_count=0, ad_count=0, job_id=None,
+                  use_cache=True, page_size=None, cancel_event=None):
+        """
+        Follow the paging cursor starting at next_url.
+        
+        Args:
+            search_params (dict): Request parameters for the first page
+            next_url (str): URL of the next page to fetch (API_BASE_URL for the first)
+            max_pages (int): Maximum number of pages to retrieve (None for all)
+            page_count (int): Pages already fetched by this job
+            ad_count (int): Ads already fetched by this job
+            job_id (str): Checkpoint progress under this id
+            use_cache (bool): Serve pages from the response cache when possible
+            page_size (PageSizeController): Controller choosing the limit of each
+                page request (None to keep the limit of the URL)
+            cancel_event (threading.Event): Stop paginating once set
+            
+        Yields:
+            list: Ad data contained in a single page
+        """
+        attempt = 0
         
         while next_url and (max_pages is None or page_count < max_pages):
+            if cancel_event is not None and cancel_event.is_set():
+                return
             try:
-                # Make request
-                if next_url == API_BASE_URL:
-                    response = requests.get(next_url, params=search_params)
-                else:
-                    # For pagination, the URL already includes parameters
-                    response = requests.get(next_url)
-                
-                # Check for rate limiting headers
-                self._update_rate_limit_info(response)
-                
-                # Handle rate limiting
-                if response.status_code == 429:
-                    wait_time = self._get_rate_limit_wait_time()
-                    print(f"Rate limited. Waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
-                    continue
-                
-                # Check for errors
-                if response.status_code != 200:
-                    error_data = response.json().get('error', {})
-                    error_message = error_data.get('message', 'Unknown error')
-                    error_code = error_data.get('code', 'Unknown code')
-                    raise Exception(f"API Error {error_code}: {error_message}")
-                
-                # Parse response
-                data = response.json()
-                
-                # Add results
-                if 'data' in data:
-                    all_results.extend(data['data'])
-                
-                # Update pagination
-                next_url = data.get('paging', {}).get('next')
-                page_count += 1
-                
-                # Implement a small delay to be nice to the API
-                time.sleep(0.5)
-                
+                data = self._fetch_page(next_url, search_params, use_cache,
+                                        limit=page_size.limit if page_size else None, cancel_event=cancel_event)
+                if data is None:
+                    # Cancelled while waiting for the rate budget
+                    return
             except Exception as e:
-                print(f"Error during API request: {e}")
-                break
+                # Retry the same URL so pagination resumes from the last good page
+                retry = self.retry_policy.on_page_error(e, attempt, page_size, self.rate_controller)
+                if retry is None:
+                    raise
+                attempt, delay = retry
+                if delay > 0:
+                    if cancel_event is not None:
+                        cancel_event.wait(delay)
+                    else:
+                        time.sleep(delay)
+                continue
+            
+            # Update pagination
+            attempt = 0
+            if page_size is not None:
+                page_size.on_success()
+            next_url = data.get('paging', {}).get('next')
+            page_count += 1
+            page = data.get('data', [])
+            ad_count += len(page)
+            
+            # Hand the page to the caller before requesting the next one
+            yield page
+            
+            # The caller is done with the page, so the job can move past it
+            if job_id:
+                self.checkpoint_store.save(job_id, search_params, next_url, page_count, ad_count,
+                                           page_sizes=page_size.stats() if page_size else None)
+    
+    def search_ads_sharded(self, params=None, shard_days=SHARD_DAYS, split_countries=False,
+                           max_workers=SHARD_MAX_WORKERS, max_pages=None, use_cache=True):
+        """
+        Search for ads by running date (and optionally country) shards concurrently.
+        
+        Every shard is paginated independently on a bounded worker pool. All
+        workers share this client's rate controller, so concurrency overlaps
+        network latency without exceeding the request budget. Ads returned by
+        more than one shard are kept once.
+        
+        Args:
+            params (dict): Search parameters to override defaults
+            shard_days (int): Number of days per date shard
+            split_countries (bool): Also run one shard per reached country
+            max_workers (int): Maximum number of shards fetched at once
+            max_pages (int): Maximum number of pages per shard (None for all)
+            use_cache (bool): Serve pages from the response cache when possible
+            
+        Returns:
+            list: De-duplicated list of ad data
+        """
+        merged_params = DEFAULT_SEARCH_PARAMS.copy()
+        if params:
+            merged_params.update(params)
+        shards = build_shards(merged_params, shard_days, split_countries)
         
-        return all_results
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.search_ads, shard, max_pages, use_cache=use_cache)
+                for shard in shards
+            ]
+            for future in as_completed(futures):
+                for ad in future.result():
+                    results.setdefault(ad.get('id'), ad)
+        
+        return list(results.values())
     
-    def _update_rate_limit_info(self, response):
-        """Update rate limit information from response headers."""
-        # Meta API typically uses x-business-use-case-usage or x-app-usage headers
-        # Format may vary, this is a simplified implementation
-        if 'x-app-usage' in response.headers:
-            try:
-                usage_data = json.loads(response.headers['x-app-usage'])
-                self.rate_limit_remaining = 100 - usage_data.get('call_count', 0)
-                # Reset time is typically not provided directly
-                self.rate_limit_reset = time.time() + 3600  # Assume 1 hour
-            except:
-                pass
+    def _fetch_page(self, url, search_params, use_cache=True, limit=None, cancel_event=None):
+        """
+        Fetch and decode one page, going through the response cache.
+        
+        Args:
+            url (str): Page URL (API_BASE_URL for the first page)
+            search_params (dict): Request parameters for the first page
+            use_cache (bool): Return a cached copy of the page if available
+            limit (int): Number of ads to ask for (None to keep the limit of the URL)
+            cancel_event (threading.Event): Give up waiting for the rate budget once set
+            
+        Returns:
+            dict: Decoded response body, or None if cancelled before the request was sent
+        """
+        if limit is not None:
+            if url == API_BASE_URL:
+                search_params = dict(search_params, limit=limit)
+            else:
+                url = set_limit(url, limit)
+        
+        # For pagination, the URL already includes parameters
+        request_params = search_params if url == API_BASE_URL else None
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(url, request_params)
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return _rewrite_paging(cached, lambda link: add_access_token(link, search_params['access_token']))
+        
+        # Wait for our turn in the shared rate budget
+        self.rate_controller.acquire(cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        
+        response = self.session.get(url, params=request_params, timeout=HTTP_TIMEOUT)
+        
+        # Adapt the request rate to the reported usage
+        self.rate_controller.update_from_headers(response.headers)
+        
+        data = self._parse_response(response)
+        if cache_key is not None:
+            # Paging links embed the access token, which must not be written to disk
+            self.cache.set(cache_key, _rewrite_paging(data, strip_access_token))
+        return data
+    
+    def _parse_response(self, response):
+        """
+        Decode a response, raising APIError for error responses.
+        
+        Args:
+            response (requests.Response): Response from the API
+            
+        Returns:
+            dict: Decoded response body
+        """
+        if response.status_code == 200:
+            return self.decoder.decode_page(response.content)
+        
+        try:
+            payload = self.decoder.decode(response.content)
+        except ValueError:
+            payload = {}
+        raise APIError.from_response(response.status_code, payload, response.headers)
     
-    def _get_rate_limit_wait_time(self):
-        """Calculate wait time based on rate limit information."""
-        if self.rate_limit_reset:
-            wait_time = max(0, self.rate_limit_reset - time.time())
-            return min(wait_time, 3600)  # Cap at 1 hour
-        return 60  # Default to 1 minute if no information available
+    def new_page_size(self, initial=None):
+        """Create the page size controller of a search, or None if page sizes are not adapted."""
+        if not self.adaptive_page_size:
+            return None
+        return PageSizeController(initial=int(initial or PAGE_SIZE_INITIAL))
+    
+    def _build_search_params(self, params=None):
+        """
+        Build the query parameters for the first page of a search.
+        
+        Args:
+            params (dict): Search parameters to override defaults
+            
+        Returns:
+            dict: Request parameters including the access token
+        """
+        return build_search_params(params, self.auth_manager.get_token())
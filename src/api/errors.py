@@ -0,0 +1,73 @@
+"""
+Errors raised by the Meta Ads Library API clients.
+"""
+
+# Graph API error codes that indicate a temporary condition
+# 1: unknown error, 2: service unavailable, 4/17/32/613: request limits reached,
+# 341: application limit reached
+TRANSIENT_ERROR_CODES = {1, 2, 4, 17, 32, 341, 613}
+
+# Error codes that mean the caller is being throttled
+THROTTLING_ERROR_CODES = {4, 17, 32, 613}
+
+class APIError(Exception):
+    """Error response returned by the Graph API."""
+    
+    def __init__(self, message, code=None, status=None, retry_after=None):
+        """
+        Initialize the error.
+        
+        Args:
+            message (str): Error message from the API
+            code (int): Graph API error code
+            status (int): HTTP status code
+            retry_after (float): Seconds the API asked us to wait, if any
+        """
+        super().__init__(f"API Error {code if code is not None else 'Unknown code'}: {message}")
+        self.message = message
+        self.code = code
+        self.status = status
+        self.retry_after = retry_after
+    
+    @classmethod
+    def from_response(cls, status, payload, headers=None):
+        """
+        Build an error from an API error response.
+        
+        Args:
+            status (int): HTTP status code
+            payload (dict): Decoded response body (may be empty)
+            headers (Mapping): Response headers, read for Retry-After
+            
+        Returns:
+            APIError: The error described by the response
+        """
+        error_data = payload.get('error', {}) if isinstance(payload, dict) else {}
+        return cls(
+            error_data.get('message', 'Unknown error'),
+            code=error_data.get('code'),
+            status=status,
+            retry_after=cls.parse_retry_after(headers)
+        )
+    
+    @staticmethod
+    def parse_retry_after(headers):
+        """Read the Retry-After header in seconds, if present."""
+        try:
+            return float(headers.get('Retry-After'))
+        except (AttributeError, TypeError, ValueError):
+            return None
+    
+    @property
+    def is_throttling(self):
+        """Whether the request was rejected for exceeding rate limits."""
+        return self.status == 429 or self.code in THROTTLING_ERROR_CODES
+    
+    @property
+    def is_transient(self):
+        """Whether repeating the same request may succeed."""
+        return (
+            self.is_throttling
+            or self.code in TRANSIENT_ERROR_CODES
+            or (self.status is not None and self.status >= 500)
+        )
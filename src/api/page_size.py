@@ -0,0 +1,118 @@
+"""
+Adaptive page size for Meta Ads Library API pagination.
+"""
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.exceptions import Timeout
+from src.utils.config import (
+    PAGE_SIZE_INITIAL, PAGE_SIZE_MIN, PAGE_SIZE_MAX, PAGE_SIZE_GROW_AFTER,
+    PAGE_SIZE_GROW_FACTOR, PAGE_SIZE_SHRINK_FACTOR
+)
+from src.api.errors import APIError
+
+# Error message the Graph API sends when a page is too expensive to build
+TOO_MUCH_DATA_MESSAGE = "reduce the amount of data"
+
+def is_too_much_data(error):
+    """Whether an error means the page asked for was too large."""
+    if isinstance(error, APIError):
+        # 504: the gateway gave up waiting for the page
+        return error.status == 504 or TOO_MUCH_DATA_MESSAGE in str(error.message or '').lower()
+    return isinstance(error, (Timeout, TimeoutError))
+
+def set_limit(url, limit):
+    """Replace the limit of a paging URL."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'limit']
+    query.append(('limit', str(limit)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+class PageSizeController:
+    """
+    Chooses the limit of each page request.
+
+    Starts with a large page and halves it whenever the API answers that
+    the page asks for too much data or the request times out. After a run
+    of successful pages the size grows again, up to max_size, so a single
+    heavy page does not slow down the rest of the search.
+    """
+
+    def __init__(self, initial=PAGE_SIZE_INITIAL, min_size=PAGE_SIZE_MIN, max_size=PAGE_SIZE_MAX,
+                 grow_after=PAGE_SIZE_GROW_AFTER, grow_factor=PAGE_SIZE_GROW_FACTOR,
+                 shrink_factor=PAGE_SIZE_SHRINK_FACTOR):
+        """
+        Initialize the controller.
+
+        Args:
+            initial (int): Limit of the first page
+            min_size (int): Smallest limit; errors at this size are left to the retry policy
+            max_size (int): Largest limit
+            grow_after (int): Successful pages in a row before the limit grows
+            grow_factor (float): Factor applied to the limit when it grows
+            shrink_factor (float): Factor applied to the limit when it shrinks
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.grow_after = grow_after
+        self.grow_factor = grow_factor
+        self.shrink_factor = shrink_factor
+        self._limit = max(min_size, min(max_size, int(initial)))
+        self._streak = 0
+        self._shrinks = 0
+        self._grows = 0
+        self._pages_by_size = {}
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        """Limit of the next page request."""
+        return self._limit
+
+    def on_success(self):
+        """
+        Record a page fetched with the current limit.
+
+        Returns:
+            int: Limit of the next page request
+        """
+        with self._lock:
+            self._pages_by_size[self._limit] = self._pages_by_size.get(self._limit, 0) + 1
+            self._streak += 1
+            if self._streak >= self.grow_after and self._limit < self.max_size:
+                self._limit = min(self.max_size, max(self._limit + 1, int(self._limit * self.grow_factor)))
+                self._grows += 1
+                self._streak = 0
+            return self._limit
+
+    def on_error(self, error):
+        """
+        Shrink the limit if an error means the page was too large.
+
+        Returns:
+            bool: True if the limit shrank and the page should be requested again
+        """
+        if not is_too_much_data(error):
+            return False
+        with self._lock:
+            self._streak = 0
+            if self._limit <= self.min_size:
+                return False
+            self._limit = max(self.min_size, int(self._limit * self.shrink_factor))
+            self._shrinks += 1
+            return True
+
+    def stats(self):
+        """
+        Get the page sizes used so far.
+
+        Returns:
+            dict: The current limit, shrink and grow counts, and the number
+                of pages fetched with each limit
+        """
+        with self._lock:
+            return {
+                'limit': self._limit,
+                'shrinks': self._shrinks,
+                'grows': self._grows,
+                'pages_by_size': {str(size): count for size, count in sorted(self._pages_by_size.items())}
+            }
@@ -0,0 +1,162 @@
+"""
+Adaptive request pacing for the Meta Ads Library API.
+"""
+import json
+import time
+import threading
+from src.utils.config import (
+    REQUEST_INTERVAL, RATE_MIN_INTERVAL, RATE_MAX_INTERVAL,
+    RATE_TARGET_USAGE, RATE_CRITICAL_USAGE, RATE_INCREASE_STEP, RATE_THROTTLE_COOLDOWN
+)
+
+USAGE_METRICS = ('call_count', 'total_cputime', 'total_time')
+
+def parse_usage_headers(headers):
+    """
+    Read the usage reported by the Graph API response headers.
+    
+    Both x-app-usage and x-business-use-case-usage report percentages of
+    the quota used for call count, CPU time and total time. The highest
+    of them is the one that will trigger throttling first.
+    
+    Args:
+        headers (Mapping): Response headers
+        
+    Returns:
+        tuple: (usage percentage or None, seconds until access is regained)
+    """
+    usage = None
+    regain_seconds = 0
+    
+    def add_usage(stats):
+        nonlocal usage, regain_seconds
+        for metric in USAGE_METRICS:
+            value = stats.get(metric)
+            if isinstance(value, (int, float)):
+                usage = value if usage is None else max(usage, value)
+        # The business use case header reports the lockout in minutes
+        regain = stats.get('estimated_time_to_regain_access')
+        if isinstance(regain, (int, float)):
+            regain_seconds = max(regain_seconds, regain * 60)
+    
+    app_usage = headers.get('x-app-usage')
+    if app_usage:
+        try:
+            add_usage(json.loads(app_usage))
+        except (ValueError, TypeError, AttributeError):
+            pass
+    
+    business_usage = headers.get('x-business-use-case-usage')
+    if business_usage:
+        try:
+            for entries in json.loads(business_usage).values():
+                for stats in entries:
+                    add_usage(stats)
+        except (ValueError, TypeError, AttributeError):
+            pass
+    
+    return usage, regain_seconds
+
+class RateController:
+    """
+    Paces requests from the usage the API reports (AIMD).
+    
+    While usage stays below the target, the request rate grows additively.
+    Above the target the interval between requests grows in proportion to
+    how close usage is to the limit, and at the critical level requests
+    pause until the API says access is regained. This keeps throughput
+    high without running into throttling and its long lockouts.
+    
+    The controller is thread-safe: concurrent workers reserve consecutive
+    time slots, so adding workers never raises the overall request rate.
+    """
+    
+    def __init__(self, initial_interval=REQUEST_INTERVAL, min_interval=RATE_MIN_INTERVAL,
+                 max_interval=RATE_MAX_INTERVAL, target_usage=RATE_TARGET_USAGE,
+                 critical_usage=RATE_CRITICAL_USAGE, increase_step=RATE_INCREASE_STEP):
+        """
+        Initialize the controller.
+        
+        Args:
+            initial_interval (float): Starting number of seconds between requests
+            min_interval (float): Shortest interval allowed between requests
+            max_interval (float): Longest interval used when backing off
+            target_usage (float): Usage percentage above which requests slow down
+            critical_usage (float): Usage percentage at which requests pause
+            increase_step (float): Requests per second added after a low-usage response
+        """
+        self.interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_usage = target_usage
+        self.critical_usage = critical_usage
+        self.increase_step = increase_step
+        self.usage = None
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+    
+    def reserve(self):
+        """
+        Reserve the next request slot.
+        
+        Returns:
+            float: Seconds the caller has to wait before sending its request
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            return slot - now
+    
+    def acquire(self, cancel_event=None):
+        """
+        Block until the caller may send its next request.
+        
+        Args:
+            cancel_event (threading.Event): Stop waiting as soon as it is set
+        """
+        wait_time = self.reserve()
+        if wait_time > 0:
+            if cancel_event is not None:
+                cancel_event.wait(wait_time)
+            else:
+                time.sleep(wait_time)
+    
+    def update_from_headers(self, headers):
+        """
+        Adjust the request rate from a response's usage headers.
+        
+        Args:
+            headers (Mapping): Response headers
+        """
+        usage, regain_seconds = parse_usage_headers(headers)
+        if usage is None:
+            return
+        
+        with self._lock:
+            self.usage = usage
+            if usage >= self.critical_usage or regain_seconds:
+                self.interval = self.max_interval
+                self._pause(max(regain_seconds, self.max_interval))
+            elif usage >= self.target_usage:
+                # Back off harder the closer usage gets to the critical level
+                pressure = (usage - self.target_usage) / (self.critical_usage - self.target_usage)
+                self.interval = min(self.max_interval, self.interval * (1.5 + pressure))
+            else:
+                rate = 1.0 / self.interval + self.increase_step
+                self.interval = max(self.min_interval, 1.0 / rate)
+    
+    def on_throttled(self, retry_after=None):
+        """
+        Back off after the API rejected a request for exceeding its limits.
+        
+        Args:
+            retry_after (float): Seconds to wait, if the API said so
+        """
+        with self._lock:
+            self.interval = min(self.max_interval, self.interval * 2)
+            self._pause(retry_after or RATE_THROTTLE_COOLDOWN)
+    
+    def _pause(self, seconds):
+        """Hold back all requests for the given number of seconds."""
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
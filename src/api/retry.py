@@ -0,0 +1,110 @@
+"""
+Retry policy for Meta Ads Library API requests.
+"""
+import random
+import requests
+from src.utils.config import RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY
+from src.api.errors import APIError
+
+# Network failures of the requests library that a new attempt may get past:
+# refused or dropped connections, timeouts and bodies cut off mid-transfer
+TRANSIENT_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+class RetryPolicy:
+    """Decides whether a failed request is retried and how long to wait first."""
+    
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY, jitter=True, transient_exceptions=TRANSIENT_EXCEPTIONS):
+        """
+        Initialize the policy.
+        
+        Args:
+            max_attempts (int): Total attempts per request, including the first
+            base_delay (float): Delay in seconds before the first retry
+            max_delay (float): Upper bound for the delay between attempts
+            jitter (bool): Randomize delays so parallel workers do not retry in lockstep
+            transient_exceptions (tuple): Non-API exceptions worth retrying;
+                anything else, such as a programming error, is raised at once
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.transient_exceptions = transient_exceptions
+    
+    def is_transient(self, error):
+        """Whether an error is worth retrying."""
+        if isinstance(error, APIError):
+            return error.is_transient
+        return isinstance(error, self.transient_exceptions)
+    
+    def should_retry(self, error, attempt):
+        """
+        Decide whether to retry after a failed attempt.
+        
+        Args:
+            error (Exception): Error raised by the attempt
+            attempt (int): Number of attempts made so far
+            
+        Returns:
+            bool: True if the request should be repeated
+        """
+        return attempt < self.max_attempts and self.is_transient(error)
+    
+    def get_delay(self, attempt):
+        """
+        Get the exponential backoff delay after a failed attempt.
+        
+        Args:
+            attempt (int): Number of attempts made so far
+            
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        if self.jitter:
+            # Full jitter: anywhere between zero and the exponential delay
+            delay = random.uniform(0, delay)
+        return delay
+    
+    def on_page_error(self, error, attempt, page_size=None, rate_controller=None):
+        """
+        Decide how a paginating client goes on after a failed page request.
+        
+        A page that was too large is requested again right away with a
+        smaller limit, without using up an attempt. Throttling is handed to
+        the rate controller, which holds back every worker sharing it; other
+        transient errors wait for the exponential backoff.
+        
+        Args:
+            error (Exception): Error raised by the page request
+            attempt (int): Failed attempts at this page so far
+            page_size (PageSizeController): Page size controller of the search, if any
+            rate_controller (RateController): Shared request pacing, if any
+            
+        Returns:
+            tuple: (attempt, delay) with the updated attempt count and the
+                seconds to wait before requesting the page again, or None
+                if the error should be raised
+        """
+        if page_size is not None and page_size.on_error(error):
+            print(f"Page too large ({error}). Retrying with limit {page_size.limit}...")
+            return attempt, 0
+        
+        attempt += 1
+        if not self.should_retry(error, attempt):
+            return None
+        
+        if rate_controller is not None and isinstance(error, APIError) and error.is_throttling:
+            print(f"Rate limited ({error}). Backing off...")
+            rate_controller.on_throttled(error.retry_after)
+            return attempt, 0
+        
+        delay = self.get_delay(attempt)
+        print(f"Error during API request: {error}. Retrying in {delay:.1f} seconds "
+              f"(attempt {attempt + 1} of {self.max_attempts})...")
+        return attempt, delay
@@ -0,0 +1,59 @@
+"""
+HTTP session factory for the Meta Ads Library API.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.utils.config import (
+    HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_KEEP_ALIVE, HTTP_GZIP
+)
+
+def create_session(pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES,
+                   backoff_factor=HTTP_BACKOFF_FACTOR, keep_alive=HTTP_KEEP_ALIVE,
+                   gzip=HTTP_GZIP):
+    """
+    Create a pooled requests session for talking to the Graph API.
+    
+    Reusing one session across pages, searches and token validation keeps
+    the TCP/TLS connection to graph.facebook.com open instead of paying a
+    new handshake for every request.
+    
+    Args:
+        pool_size (int): Number of connections kept open per host
+        max_retries (int): Transport-level retries for connection errors and 502/503 responses
+        backoff_factor (float): Backoff factor between transport retries
+        keep_alive (bool): Keep connections open between requests
+        gzip (bool): Request gzip-compressed responses
+        
+    Returns:
+        requests.Session: Configured session
+    """
+    session = requests.Session()
+    
+    # Only retry failures that happen before the API processed the request;
+    # rate limiting and Graph API errors are handled by the client itself.
+    # Read timeouts and 504s reach the client unretried, so it can ask for a
+    # smaller page instead of repeating the same slow request.
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=False,
+        status=max_retries,
+        status_forcelist=(502, 503),
+        allowed_methods=frozenset(["GET"]),
+        backoff_factor=backoff_factor,
+        raise_on_status=False,
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    
+    session.headers["Accept-Encoding"] = "gzip, deflate" if gzip else "identity"
+    session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+    
+    return session
@@ -0,0 +1,76 @@
+"""
+Splitting of large searches into independent sub-queries.
+"""
+from datetime import datetime, timedelta
+
+DATE_FORMAT = "%Y-%m-%d"
+
+def split_date_range(date_min, date_max, shard_days):
+    """
+    Split an inclusive date window into consecutive, non-overlapping windows.
+    
+    Args:
+        date_min (str): First day of the window (YYYY-MM-DD)
+        date_max (str): Last day of the window (YYYY-MM-DD)
+        shard_days (int): Number of days per shard
+        
+    Returns:
+        list: (date_min, date_max) string tuples covering the window
+    """
+    if shard_days < 1:
+        raise ValueError("shard_days must be at least 1")
+    
+    start = datetime.strptime(date_min, DATE_FORMAT)
+    end = datetime.strptime(date_max, DATE_FORMAT)
+    if start > end:
+        raise ValueError("Start date cannot be after end date")
+    
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=shard_days - 1), end)
+        windows.append((start.strftime(DATE_FORMAT), window_end.strftime(DATE_FORMAT)))
+        start = window_end + timedelta(days=1)
+    
+    return windows
+
+def build_shards(params, shard_days=30, split_countries=False):
+    """
+    Build the sub-query parameters for a sharded search.
+    
+    The date window is only split when both ad_delivery_date_min and
+    ad_delivery_date_max are set.
+    
+    Args:
+        params (dict): Search parameters of the full search
+        shard_days (int): Number of days per date shard
+        split_countries (bool): Also run one sub-query per reached country
+        
+    Returns:
+        list: Search parameter dicts, one per shard
+    """
+    date_min = params.get("ad_delivery_date_min")
+    date_max = params.get("ad_delivery_date_max")
+    if date_min and date_max:
+        date_windows = split_date_range(date_min, date_max, shard_days)
+    else:
+        date_windows = [(date_min, date_max)]
+    
+    countries = params.get("ad_reached_countries")
+    if split_countries and isinstance(countries, list) and len(countries) > 1:
+        country_groups = [[country] for country in countries]
+    else:
+        country_groups = [countries]
+    
+    shards = []
+    for window_min, window_max in date_windows:
+        for country_group in country_groups:
+            shard = dict(params)
+            if window_min:
+                shard["ad_delivery_date_min"] = window_min
+            if window_max:
+                shard["ad_delivery_date_max"] = window_max
+            if country_group is not None:
+                shard["ad_reached_countries"] = country_group
+            shards.append(shard)
+    
+    return shards
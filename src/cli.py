@@ -0,0 +1,394 @@
+"""
+Command line interface for the Meta Ads Library Scraper.
+
+Runs searches without the graphical interface, e.g. on servers without a
+display or from cron:
+
+    python -m src search --terms "climate" --countries US,CA --format parquet
+    python -m src resume 20240101_120000_ab12cd34
+    python -m src sync --terms "climate" --countries US
+    python -m src batch campaign_queries.json --workers 4
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timedelta
+from src.utils.config import (
+    DEFAULT_SEARCH_PARAMS, FIELD_PROFILES, DEFAULT_FIELD_PROFILE, SHARD_MAX_WORKERS, BATCH_MAX_WORKERS,
+    STORE_ENABLED, STORE_PATH, get_api_token
+)
+from src.api.auth import AuthManager
+from src.api.client import APIClient
+from src.api.checkpoint import CheckpointStore
+from src.data.processor import DataProcessor
+from src.data.pipeline import PagePipeline
+from src.data.excel_export import ExcelExporter
+from src.data.parquet_export import FILE_EXTENSIONS, ParquetExporter
+from src.data.store import AdStore
+from src.data.sync import DeltaSync
+from src.data.batch import BatchRunner, load_queries
+from src.data.dedup import DedupIndex
+
+# Values offered by the search tab
+AD_TYPES = [
+    "ALL",
+    "POLITICAL_AND_ISSUE_ADS",
+    "HOUSING_ADS",
+    "EMPLOYMENT_ADS",
+    "FINANCIAL_PRODUCTS_AND_SERVICES_ADS"
+]
+AD_STATUSES = ["ACTIVE", "INACTIVE", "ALL"]
+PLATFORMS = ["FACEBOOK", "INSTAGRAM", "AUDIENCE_NETWORK", "MESSENGER", "WHATSAPP"]
+OUTPUT_FORMATS = ["xlsx", "parquet", "arrow"]
+
+def _date(value):
+    """argparse type for YYYY-MM-DD dates."""
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD")
+    return value
+
+def _list(value):
+    """argparse type for comma-separated lists."""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def _platforms(value):
+    """argparse type for a comma-separated list of publisher platforms."""
+    platforms = [item.upper() for item in _list(value)]
+    unknown = [item for item in platforms if item not in PLATFORMS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown platforms: {', '.join(unknown)}")
+    return platforms
+
+def _add_search_arguments(parser, rolling_window=True):
+    """Add the search tab's parameters to a parser, by default searching the last 30 days."""
+    today = datetime.now()
+    group = parser.add_argument_group("search parameters")
+    group.add_argument("--terms", default="", help="search terms")
+    group.add_argument("--ad-type", choices=AD_TYPES, default=DEFAULT_SEARCH_PARAMS["ad_type"])
+    group.add_argument("--countries", type=_list, default=DEFAULT_SEARCH_PARAMS["ad_reached_countries"],
+                       help="comma-separated country codes (default: US)")
+    group.add_argument("--status", choices=AD_STATUSES, default=DEFAULT_SEARCH_PARAMS["ad_active_status"],
+                       help="ad active status")
+    group.add_argument("--platforms", type=_platforms, default=["FACEBOOK", "INSTAGRAM"],
+                       help=f"comma-separated platforms out of {','.join(PLATFORMS)}")
+    if rolling_window:
+        group.add_argument("--date-min", type=_date, default=(today - timedelta(days=30)).strftime("%Y-%m-%d"),
+                           help="earliest delivery date, YYYY-MM-DD (default: 30 days ago)")
+        group.add_argument("--date-max", type=_date, default=today.strftime("%Y-%m-%d"),
+                           help="latest delivery date, YYYY-MM-DD (default: today)")
+    else:
+        # A sync tracks its own window and always runs up to today
+        group.add_argument("--date-min", type=_date,
+                           help="earliest delivery date of the first sync, YYYY-MM-DD (default: no limit)")
+    _add_fields_argument(group)
+
+def _add_fields_argument(parser, default=DEFAULT_FIELD_PROFILE):
+    """Add the field profile option to a parser."""
+    parser.add_argument("--fields", choices=list(FIELD_PROFILES), default=default,
+                        help="field profile requested from the API; smaller profiles fetch faster "
+                             f"(default: {default or 'the query file or ' + DEFAULT_FIELD_PROFILE})")
+
+def _add_output_arguments(parser):
+    """Add the export options to a parser."""
+    group = parser.add_argument_group("output")
+    group.add_argument("--format", choices=OUTPUT_FORMATS, default="xlsx", help="export format")
+    group.add_argument("-o", "--output", help="output file (default: meta_ads_export_<timestamp>.<format>)")
+
+def _add_common_arguments(parser):
+    """Add options shared by every command."""
+    parser.add_argument("--token", help="API access token (default: META_ADS_API_TOKEN)")
+    parser.add_argument("--max-pages", type=int, help="stop after this many pages")
+    parser.add_argument("--no-cache", action="store_true", help="do not serve pages from the response cache")
+    parser.add_argument("--no-store", action="store_true", help="do not write the ads to the local store")
+    parser.add_argument("--store", default=STORE_PATH, help="local store database (default: %(default)s)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors and the output paths")
+
+def build_parser():
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Extract ads from the Meta Ads Library API without the graphical interface."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="run a search and export the results")
+    _add_search_arguments(search)
+    _add_output_arguments(search)
+    _add_common_arguments(search)
+    search.add_argument("--max-results", type=int, help="stop after this many ads")
+    search.add_argument("--job-id", help="checkpoint id used to resume the search (default: a new id)")
+    search.add_argument("--shard-days", type=int,
+                        help="split the date range into shards of this many days, fetched concurrently")
+    search.add_argument("--split-countries", action="store_true", help="also run one shard per country")
+    search.add_argument("--workers", type=int, default=SHARD_MAX_WORKERS,
+                        help="shards fetched at once (default: %(default)s)")
+
+    resume = commands.add_parser("resume", help="resume an interrupted search from its checkpoint")
+    resume.add_argument("job_id", help="checkpoint id of the search")
+    _add_output_arguments(resume)
+    _add_common_arguments(resume)
+
+    sync = commands.add_parser("sync", help="fetch only new or changed ads of a saved search into the store")
+    _add_search_arguments(sync, rolling_window=False)
+    _add_common_arguments(sync)
+    sync.add_argument("--full", action="store_true", help="ignore the previous sync and fetch everything")
+
+    batch = commands.add_parser("batch", help="run many searches from a JSON or CSV file into the store")
+    batch.add_argument("queries", help="JSON or CSV file with the queries")
+    _add_common_arguments(batch)
+    batch.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS,
+                       help="queries fetched at once, sharing one rate budget (default: %(default)s)")
+    _add_fields_argument(batch, default=None)
+    batch.add_argument("--dedup-db",
+                       help="SQLite file remembering the ids already seen, for very large batches "
+                            "(default: in memory)")
+    batch.add_argument("--dedup-run",
+                       help="run id of an interrupted batch to continue in --dedup-db; ads seen by other runs "
+                            "are fetched and refreshed again (default: a new run)")
+
+    commands.add_parser("jobs", help="list the checkpoints of searches that can be resumed")
+    return parser
+
+def _search_params(args):
+    """Build the search parameters from the parsed arguments."""
+    date_max = getattr(args, "date_max", None)
+    if args.date_min and date_max and args.date_min > date_max:
+        raise ValueError("Start date cannot be after end date")
+    params = {
+        "search_terms": args.terms,
+        "ad_type": args.ad_type,
+        "ad_reached_countries": args.countries,
+        "ad_active_status": args.status,
+        "publisher_platforms": args.platforms,
+        "ad_delivery_date_min": args.date_min,
+        "ad_delivery_date_max": date_max,
+        "fields": FIELD_PROFILES[args.fields]
+    }
+    return {key: value for key, value in params.items() if value is not None}
+
+def _log(args, message):
+    """Print a progress message to stderr unless --quiet was given."""
+    if not args.quiet:
+        print(message, file=sys.stderr)
+
+def _output_path(args):
+    """Get the output file of an export."""
+    if args.output:
+        return args.output
+    extension = "xlsx" if args.format == "xlsx" else FILE_EXTENSIONS[args.format].lstrip(".")
+    return f"meta_ads_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+def _export(args, pages, search_params, store, max_results=None, checkpoint_store=None):
+    """
+    Process pages as they arrive and export them.
+
+    With a checkpoint store, the job args.job_id is marked completed when
+    the export stops at max_results.
+
+    Returns:
+        list: Paths of the written files
+    """
+    output = _output_path(args)
+    sinks = [store] if store is not None else []
+    parquet_exporter = None
+    if args.format != "xlsx":
+        parquet_exporter = ParquetExporter(args.format)
+        parquet_exporter.open(output, search_params)
+        sinks.append(parquet_exporter)
+
+    pipeline = PagePipeline(DataProcessor(keep_raw=False, fields=search_params.get("fields")), sinks)
+    start_time = time.monotonic()
+    interruption = []
+
+    def processed_rows():
+        try:
+            for processed_page in pipeline.run(pages, max_results):
+                # The sinks and the exporter take the page from here; nothing needs to stay in memory
+                pipeline.processor.reset()
+                elapsed = time.monotonic() - start_time
+                _log(args, f"Fetched {pipeline.page_count} pages, {pipeline.ad_count} ads ({elapsed:.0f}s)")
+                yield from processed_page
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            # End the rows here so the export of what was fetched is completed; re-raised below
+            interruption.append(e)
+
+    try:
+        if parquet_exporter is None:
+            # Rows are written to the workbook as they are processed, a new shard whenever one fills
+            paths = ExcelExporter().export_rows_sharded(processed_rows(), search_params, output)
+        else:
+            for _ in processed_rows():
+                pass
+    finally:
+        # Keep whatever was fetched, also when the search fails or is interrupted
+        if parquet_exporter is not None:
+            paths = list(parquet_exporter.close().values())
+
+    if interruption:
+        # A resumed search exports the remaining pages to a new file
+        if pipeline.ad_count:
+            _log(args, f"Exported the {pipeline.ad_count} ads fetched so far to {os.path.abspath(paths[0])}")
+        raise interruption[0]
+    if checkpoint_store is not None and max_results is not None and pipeline.ad_count >= max_results:
+        # The last page may have been cut at the limit, so the job is not continued past it
+        checkpoint_store.complete(args.job_id, pipeline.page_count, pipeline.ad_count)
+    _log(args, f"Exported {pipeline.ad_count} ads")
+    return paths
+
+def _open_store(args):
+    """Open the local store unless it is disabled."""
+    if args.no_store or not STORE_ENABLED:
+        return None
+    return AdStore(args.store)
+
+def run_search(args, api_client):
+    """Run the search command."""
+    search_params = _search_params(args)
+    if not args.shard_days:
+        # Checkpoint every unsharded search so an interrupted run can be resumed
+        args.job_id = args.job_id or CheckpointStore.new_job_id()
+
+    store = _open_store(args)
+    try:
+        if store is not None:
+            store.start_job(search_params, args.job_id)
+
+        if args.shard_days:
+            _log(args, f"Fetching shards of {args.shard_days} days with {args.workers} workers")
+            ads = api_client.search_ads_sharded(
+                search_params, shard_days=args.shard_days, split_countries=args.split_countries,
+                max_workers=args.workers, max_pages=args.max_pages, use_cache=not args.no_cache
+            )
+            pages = [ads]
+            checkpoint_store = None
+        else:
+            _log(args, f"Search job {args.job_id}")
+            pages = api_client.iter_pages(
+                search_params, max_pages=args.max_pages, job_id=args.job_id, use_cache=not args.no_cache
+            )
+            checkpoint_store = api_client.checkpoint_store
+        return _export(args, pages, search_params, store, args.max_results, checkpoint_store)
+    finally:
+        if store is not None:
+            store.close()
+
+def run_resume(args, api_client):
+    """Run the resume command."""
+    checkpoint = api_client.checkpoint_store.load(args.job_id)
+    if checkpoint is None:
+        raise ValueError(f"No checkpoint found for job {args.job_id}")
+    if args.format == "xlsx" and args.output and os.path.exists(args.output):
+        # The interrupted run may have exported its pages to this workbook
+        raise ValueError(f"{args.output} already exists; choose another --output for the resumed pages")
+
+    store = _open_store(args)
+    try:
+        if store is not None:
+            store.start_job(checkpoint["params"], args.job_id)
+        pages = api_client.resume(args.job_id, max_pages=args.max_pages, use_cache=not args.no_cache)
+        return _export(args, pages, checkpoint["params"], store)
+    finally:
+        if store is not None:
+            store.close()
+
+def run_sync(args, api_client):
+    """Run the sync command."""
+    if args.no_store:
+        raise ValueError("sync writes into the local store and cannot run with --no-store")
+
+    with AdStore(args.store) as store:
+        result = DeltaSync(api_client, store).run(_search_params(args), full=args.full, max_pages=args.max_pages)
+    _log(args, f"Synced from {result['date_min'] or 'the beginning'}: {result['pages']} pages, "
+               f"{result['fetched']} ads fetched")
+    if not result['completed']:
+        _log(args, "Stopped at --max-pages; the next sync starts from the same point")
+    print(f"inserted={result['inserted']} updated={result['updated']} unchanged={result['unchanged']}")
+    return []
+
+def run_batch(args, api_client):
+    """Run the batch command."""
+    if args.no_store:
+        raise ValueError("batch writes into the local store and cannot run with --no-store")
+
+    queries = load_queries(args.queries)
+    if not queries:
+        raise ValueError(f"No queries found in {args.queries}")
+    if args.fields:
+        for query in queries:
+            query['params'].setdefault('fields', FIELD_PROFILES[args.fields])
+    _log(args, f"Running {len(queries)} queries with {args.workers} workers")
+
+    def on_query_done(result):
+        terms = result['params'].get('search_terms', '')
+        _log(args, f"[{result['index'] + 1}/{len(queries)}] {result['status']} '{terms}': "
+                   f"{result['fetched']} ads, {result['duplicate_rate']:.0%} duplicates, {result['inserted']} new"
+                   + (f" ({result['error']})" if result['error'] else ""))
+
+    if args.dedup_run and not args.dedup_db:
+        raise ValueError("--dedup-run requires --dedup-db")
+
+    with AdStore(args.store) as store, DedupIndex(args.dedup_db, args.dedup_run) as dedup:
+        if args.dedup_db:
+            args.dedup_run = dedup.run_id
+            _log(args, f"Dedup run {dedup.run_id}")
+        runner = BatchRunner(api_client, store, max_workers=args.workers, max_pages=args.max_pages, dedup=dedup)
+        results = runner.run(queries, on_query_done)
+
+    totals = {
+        key: sum(result[key] for result in results)
+        for key in ('fetched', 'duplicates', 'inserted', 'updated', 'unchanged')
+    }
+    failed = sum(result['status'] == 'failed' for result in results)
+    print(f"queries={len(results)} failed={failed} fetched={totals['fetched']} duplicates={totals['duplicates']} "
+          f"inserted={totals['inserted']} updated={totals['updated']} unchanged={totals['unchanged']}")
+    if failed:
+        raise RuntimeError(f"{failed} of {len(results)} queries failed")
+    return []
+
+def run_jobs(api_client):
+    """Run the jobs command."""
+    for checkpoint in api_client.checkpoint_store.list_jobs():
+        status = "completed" if checkpoint.get("completed") else "resumable"
+        page_sizes = checkpoint.get("page_sizes") or {}
+        print(f"{checkpoint['job_id']}\t{status}\t{checkpoint.get('page_count', 0)} pages\t"
+              f"{checkpoint.get('ad_count', 0)} ads\tlimit {page_sizes.get('limit', '-')}\t"
+              f"{checkpoint.get('updated_at', '')}")
+
+def main(argv=None):
+    """
+    Entry point of the command line interface.
+
+    Returns:
+        int: Process exit code
+    """
+    args = build_parser().parse_args(argv)
+    api_client = APIClient(AuthManager(getattr(args, "token", None) or get_api_token()))
+
+    try:
+        if args.command == "jobs":
+            run_jobs(api_client)
+            return 0
+
+        commands = {"search": run_search, "resume": run_resume, "sync": run_sync, "batch": run_batch}
+        for path in commands[args.command](args, api_client):
+            print(os.path.abspath(path))
+        return 0
+    except KeyboardInterrupt:
+        job_id = getattr(args, "job_id", None)
+        if job_id:
+            print(f"Interrupted; continue with: python -m src resume {job_id}", file=sys.stderr)
+        elif getattr(args, "dedup_run", None):
+            print(f"Interrupted; continue with: python -m src batch {args.queries} "
+                  f"--dedup-db {args.dedup_db} --dedup-run {args.dedup_run}", file=sys.stderr)
+        return 130
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    except Exception as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        return 1
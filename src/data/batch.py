@@ -0,0 +1,250 @@
+"""
+Batch jobs running many searches into the local ad store.
+"""
+import re
+import csv
+import json
+import queue
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.config import BATCH_MAX_WORKERS
+from src.data.processor import DataProcessor
+from src.data.dedup import DedupIndex
+
+# Search parameters that hold lists; in CSV files their items are separated by ',' or ';'
+LIST_PARAMS = ('ad_reached_countries', 'publisher_platforms')
+
+def make_query(params, priority=0):
+    """
+    Build a batch query.
+
+    Args:
+        params (dict): Search parameters of the query
+        priority (int): Queries with a higher priority are started first
+
+    Returns:
+        dict: The query, with 'params' and 'priority'
+    """
+    return {'params': dict(params), 'priority': int(priority or 0)}
+
+def expand_queries(keywords, countries=None, date_windows=None, base_params=None, priority=0):
+    """
+    Build one query per keyword x country x date window.
+
+    Args:
+        keywords (list): Search terms
+        countries (list): Country codes, one query each (default: those of base_params)
+        date_windows (list): (date_min, date_max) pairs (default: those of base_params)
+        base_params (dict): Parameters shared by every query
+        priority (int): Priority of every query
+
+    Returns:
+        list: Batch queries
+    """
+    base_params = base_params or {}
+    country_groups = [[country] for country in countries] if countries else [None]
+    date_windows = date_windows or [(None, None)]
+
+    queries = []
+    for keyword, country_group, (date_min, date_max) in itertools.product(keywords, country_groups, date_windows):
+        params = dict(base_params, search_terms=keyword)
+        if country_group is not None:
+            params['ad_reached_countries'] = country_group
+        if date_min:
+            params['ad_delivery_date_min'] = date_min
+        if date_max:
+            params['ad_delivery_date_max'] = date_max
+        queries.append(make_query(params, priority))
+    return queries
+
+def load_queries(path):
+    """
+    Load batch queries from a JSON or CSV file.
+
+    A JSON file holds either a list of search parameter objects, or an
+    object with "keywords", "countries", "date_windows", "params" and
+    "priority" that is expanded with expand_queries() plus an optional
+    list of extra "queries". Each search parameter object may carry a
+    "priority".
+
+    A CSV file has one query per row and one search parameter per column,
+    plus an optional "priority" column.
+
+    Returns:
+        list: Batch queries
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        queries = []
+        for row in rows:
+            params = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            for key in LIST_PARAMS:
+                if key in params:
+                    params[key] = [item.strip() for item in re.split(r'[;,]', params[key]) if item.strip()]
+            queries.append(make_query(params, params.pop('priority', 0)))
+        return queries
+
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+
+    if isinstance(spec, list):
+        items, queries = spec, []
+    else:
+        items = spec.get('queries', [])
+        queries = expand_queries(
+            spec.get('keywords', []),
+            countries=spec.get('countries'),
+            date_windows=spec.get('date_windows'),
+            base_params=spec.get('params'),
+            priority=spec.get('priority', 0)
+        )
+
+    for item in items:
+        params = dict(item)
+        queries.append(make_query(params, params.pop('priority', 0)))
+    return queries
+
+class BatchRunner:
+    """
+    Runs a list of searches concurrently into one AdStore.
+
+    Queries are taken in priority order by a bounded pool of workers.
+    All workers share the API client and therefore its RateController,
+    so the whole batch stays within a single rate budget. Ads are merged
+    into the store by id, so ads returned by several queries are stored
+    once; each query is recorded as its own job. Ads an earlier query
+    already returned are dropped by a DedupIndex before they are
+    processed, and counted as that query's duplicates; they are still
+    linked to the query's job. A failing query is
+    reported and does not stop the others.
+    """
+
+    def __init__(self, api_client, store, max_workers=BATCH_MAX_WORKERS, max_pages=None, dedup=None):
+        """
+        Initialize the runner.
+
+        Args:
+            api_client (APIClient): Client shared by all workers
+            store (AdStore): Store the ads are merged into
+            max_workers (int): Queries fetched at once
+            max_pages (int): Maximum number of pages per query (None for all pages)
+            dedup (DedupIndex): Index of ads already seen (default: a new in-memory index per run)
+        """
+        self.api_client = api_client
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pages = max_pages
+        self.dedup = dedup
+        self._run_dedup = None
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Stop starting queries and stop running ones after their current page."""
+        self._cancel_event.set()
+
+    def run(self, queries, on_query_done=None):
+        """
+        Run the queries.
+
+        Args:
+            queries (list): Batch queries, see make_query()
+            on_query_done (callable): Called with each result as its query finishes,
+                from the worker thread
+
+        Returns:
+            list: One result per query, in the order of queries, with the
+                query's index, params, priority, job_id, status ('completed',
+                'failed', 'cancelled' or 'skipped'), pages, fetched,
+                duplicates, duplicate_rate, inserted, updated, unchanged,
+                page_sizes and error
+        """
+        self._cancel_event.clear()
+        self._run_dedup = self.dedup if self.dedup is not None else DedupIndex()
+        pending = queue.PriorityQueue()
+        for index, query in enumerate(queries):
+            # Highest priority first, file order within a priority
+            pending.put((-query.get('priority', 0), index))
+
+        results = [None] * len(queries)
+
+        def worker():
+            while True:
+                try:
+                    _, index = pending.get_nowait()
+                except queue.Empty:
+                    return
+                result = self._run_query(index, queries[index])
+                results[index] = result
+                if on_query_done:
+                    on_query_done(result)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            workers = [executor.submit(worker) for _ in range(min(self.max_workers, len(queries)))]
+            try:
+                for future in workers:
+                    future.result()
+            except BaseException:
+                # e.g. KeyboardInterrupt: let the workers wind down before the pool is joined
+                self.cancel()
+                raise
+        return results
+
+    def _run_query(self, index, query):
+        """Fetch one query and merge its pages into the store."""
+        params = query['params']
+        result = {
+            'index': index,
+            'params': params,
+            'priority': query.get('priority', 0),
+            'job_id': None,
+            'status': 'completed',
+            'pages': 0,
+            'fetched': 0,
+            'duplicates': 0,
+            'duplicate_rate': 0.0,
+            'inserted': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'page_sizes': None,
+            'error': None
+        }
+        if self._cancel_event.is_set():
+            result['status'] = 'skipped'
+            return result
+
+        # Each query tunes its own page size, so a heavy query does not shrink the others
+        page_size = self.api_client.new_page_size(params.get('limit'))
+        try:
+            result['job_id'] = self.store.add_job(params)
+            processor = DataProcessor(keep_raw=False, fields=params.get('fields'))
+            for page in self.api_client.iter_pages(params, max_pages=self.max_pages, page_size=page_size):
+                result['pages'] += 1
+                result['fetched'] += len(page)
+
+                # Only ads no earlier query returned are processed and merged
+                new_ads = self._run_dedup.filter_new(page, index)
+                result['duplicates'] += len(page) - len(new_ads)
+                if len(new_ads) < len(page):
+                    # Duplicates are not processed again but still belong to this query's job
+                    kept = {id(ad) for ad in new_ads}
+                    self.store.link_ads([ad for ad in page if id(ad) not in kept], job_id=result['job_id'])
+                if new_ads:
+                    processed_page = processor.process_ads_data(new_ads)
+                    counts = self.store.merge_page(processed_page, raw_data=new_ads, job_id=result['job_id'])
+                    for key, count in counts.items():
+                        result[key] += count
+
+                if self._cancel_event.is_set():
+                    result['status'] = 'cancelled'
+                    break
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+
+        if page_size is not None:
+            result['page_sizes'] = page_size.stats()
+        if result['fetched']:
+            result['duplicate_rate'] = result['duplicates'] / result['fetched']
+        return result
@@ -0,0 +1,197 @@
+"""
+Cross-query deduplication of ads by id.
+"""
+import os
+import math
+import uuid
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+import numpy as np
+from src.utils.config import DEDUP_BLOOM_CAPACITY, DEDUP_BLOOM_ERROR_RATE
+
+# Ids looked up per query, below SQLite's bound parameter limit
+_LOOKUP_CHUNK = 500
+
+class BloomFilter:
+    """
+    Bit array answering "definitely not seen" for ad ids.
+
+    Used in front of the SQLite backing of DedupIndex so that ids that
+    were never seen, the common case, need no database lookup.
+    """
+
+    def __init__(self, capacity=DEDUP_BLOOM_CAPACITY, error_rate=DEDUP_BLOOM_ERROR_RATE):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity (int): Number of ids the filter is sized for
+            error_rate (float): False positive rate at capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, ids):
+        """Get the (len(ids), hash_count) bit positions of ids by double hashing."""
+        digests = b''.join(hashlib.blake2b(str(ad_id).encode('utf-8'), digest_size=16).digest() for ad_id in ids)
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            return (halves[:, :1] + steps * halves[:, 1:]) % np.uint64(self.size)
+
+    def add(self, ids):
+        """Add ids to the filter."""
+        if not ids:
+            return
+        positions = self._positions(ids).ravel()
+        np.bitwise_or.at(self.bits, positions // 8, np.left_shift(1, positions % 8).astype(np.uint8))
+
+    def might_contain(self, ids):
+        """
+        Check ids against the filter.
+
+        Returns:
+            numpy.ndarray: bool per id; False means the id was definitely not added
+        """
+        if not ids:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(ids)
+        bits = (self.bits[positions // 8] >> (positions % 8).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+class DedupIndex:
+    """
+    Remembers the ids of ads already seen across queries.
+
+    By default the ids are kept in an in-memory set. With a path they are
+    kept in a SQLite table instead, behind a Bloom filter, so very large
+    runs do not need memory for every id. The stored ids are scoped to a
+    run id: a new run starts empty, so ads seen by earlier runs are fetched
+    and refreshed again, while opening the index with the id of an
+    interrupted run continues that run. Duplicate counts are kept per query.
+    """
+
+    def __init__(self, path=None, run_id=None):
+        """
+        Initialize the index.
+
+        Args:
+            path (str): SQLite file backing the index (None for in memory only)
+            run_id (str): Run whose ids are remembered in the file (default: a new run)
+        """
+        self.path = path
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._connection = None
+        self._bloom = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS seen_ads (run_id TEXT, id TEXT, PRIMARY KEY (run_id, id)) WITHOUT ROWID"
+            )
+            self._bloom = BloomFilter()
+            cursor = self._connection.execute("SELECT id FROM seen_ads WHERE run_id = ?", (self.run_id,))
+            while True:
+                rows = cursor.fetchmany(100000)
+                if not rows:
+                    break
+                self._bloom.add([row[0] for row in rows])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close the SQLite backing, if any."""
+        if self._connection is not None:
+            with self._lock:
+                self._connection.close()
+                self._connection = None
+
+    def __len__(self):
+        """Number of distinct ids seen."""
+        if self._connection is None:
+            return len(self._seen)
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM seen_ads WHERE run_id = ?", (self.run_id,)
+            ).fetchone()[0]
+
+    def filter_new(self, ads, query=None):
+        """
+        Drop ads whose id was already seen and remember the rest.
+
+        Args:
+            ads (list): Raw or processed ads with an 'id'
+            query: Key the duplicate counts are recorded under, e.g. a query index
+
+        Returns:
+            list: The ads seen for the first time, in their original order
+        """
+        ids = [ad.get('id') for ad in ads]
+        with self._lock:
+            if self._connection is None:
+                new_ids = self._filter_in_memory(ids)
+            else:
+                new_ids = self._filter_on_disk(ids)
+
+            kept = []
+            for ad, ad_id in zip(ads, ids):
+                # Ads without an id cannot be matched and are always kept
+                if ad_id is None:
+                    kept.append(ad)
+                elif ad_id in new_ids:
+                    new_ids.discard(ad_id)
+                    kept.append(ad)
+
+            stats = self.stats.setdefault(query, {'total': 0, 'duplicates': 0})
+            stats['total'] += len(ads)
+            stats['duplicates'] += len(ads) - len(kept)
+        return kept
+
+    def duplicate_rate(self, query=None):
+        """Get the share of a query's ads that were duplicates (0.0 without ads)."""
+        stats = self.stats.get(query)
+        if not stats or not stats['total']:
+            return 0.0
+        return stats['duplicates'] / stats['total']
+
+    def _filter_in_memory(self, ids):
+        """Get the set of ids not seen before and remember them. Call with the lock held."""
+        new_ids = {ad_id for ad_id in ids if ad_id is not None} - self._seen
+        self._seen.update(new_ids)
+        return new_ids
+
+    def _filter_on_disk(self, ids):
+        """Get the set of ids not seen before and store them. Call with the lock held."""
+        unique_ids = list(dict.fromkeys(ad_id for ad_id in ids if ad_id is not None))
+
+        # Only ids the Bloom filter may have seen need a database lookup
+        maybe_seen = [ad_id for ad_id, maybe in zip(unique_ids, self._bloom.might_contain(unique_ids)) if maybe]
+        seen = set()
+        for start in range(0, len(maybe_seen), _LOOKUP_CHUNK):
+            chunk = maybe_seen[start:start + _LOOKUP_CHUNK]
+            rows = self._connection.execute(
+                f"SELECT id FROM seen_ads WHERE run_id = ? AND id IN ({', '.join('?' * len(chunk))})",
+                [self.run_id] + chunk
+            )
+            seen.update(row[0] for row in rows)
+
+        new_ids = [ad_id for ad_id in unique_ids if ad_id not in seen]
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO seen_ads (run_id, id) VALUES (?, ?)",
+                ((self.run_id, ad_id) for ad_id in new_ids)
+            )
+        self._bloom.add(new_ids)
+        return set(new_ids)
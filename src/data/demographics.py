@@ -0,0 +1,115 @@
+"""
+Fixed age x gender demographic matrix for Meta Ads Library API results.
+"""
+import numpy as np
+
+# Age buckets reported by the API, in column order; ages not listed here count as 'unknown'
+AGE_BUCKETS = ['13-17', '18-24', '25-34', '35-44', '45-54', '55-64', '65+', 'unknown']
+
+# Genders reported by the API, in column order; genders not listed here count as 'unknown'
+GENDERS = ['male', 'female', 'unknown']
+
+UNKNOWN_BUCKET = 'unknown'
+
+# Shared column index: one (age, gender) bucket per position of a demographic vector
+DEMOGRAPHIC_BUCKETS = [(age, gender) for age in AGE_BUCKETS for gender in GENDERS]
+
+# Column names of the buckets in tabular output, e.g. demo_25-34_female
+DEMOGRAPHIC_KEYS = [
+    f"demo_{age}_{gender}".lower().replace('+', 'plus')
+    for age, gender in DEMOGRAPHIC_BUCKETS
+]
+
+# Percentages are stored with this precision
+DEMOGRAPHIC_DTYPE = np.float32
+
+# Digits kept when converting stored percentages back to Python floats
+DEMOGRAPHIC_DECIMALS = 6
+
+_BUCKET_INDEX = {bucket: i for i, bucket in enumerate(DEMOGRAPHIC_BUCKETS)}
+
+_AGE_SET = set(AGE_BUCKETS)
+_GENDER_SET = set(GENDERS)
+
+def bucket_index(age, gender):
+    """Get the position of an age/gender bucket; unrecognised ages and genders map to 'unknown'."""
+    age = str(age).strip()
+    gender = str(gender).strip().lower()
+    if age not in _AGE_SET:
+        age = UNKNOWN_BUCKET
+    if gender not in _GENDER_SET:
+        gender = UNKNOWN_BUCKET
+    return _BUCKET_INDEX[(age, gender)]
+
+def demographic_header(age, gender):
+    """Readable header of a bucket, e.g. '25-34 Female'."""
+    return f"{age.capitalize()} {gender.capitalize()}"
+
+def demographic_vector(distribution):
+    """
+    Convert an API demographic_distribution into a fixed-size vector.
+
+    Buckets are placed at their DEMOGRAPHIC_BUCKETS position and missing
+    buckets are NaN. Ages and genders outside the index are added up in
+    the matching 'unknown' bucket instead of being dropped.
+
+    Args:
+        distribution (list): The ad's demographic_distribution entries
+
+    Returns:
+        numpy.ndarray: float32 vector of len(DEMOGRAPHIC_BUCKETS), or None without a distribution
+    """
+    if not distribution:
+        return None
+
+    vector = np.full(len(DEMOGRAPHIC_BUCKETS), np.nan, dtype=DEMOGRAPHIC_DTYPE)
+    for item in distribution:
+        index = bucket_index(item.get('age', ''), item.get('gender', ''))
+        try:
+            percentage = float(item.get('percentage'))
+        except (TypeError, ValueError):
+            continue
+        vector[index] = percentage if np.isnan(vector[index]) else vector[index] + percentage
+    return vector
+
+def demographic_from_bytes(blob):
+    """
+    Read a demographic vector stored with ndarray.tobytes().
+
+    Vectors stored before the 'unknown' age row existed are shorter and
+    are padded with NaN.
+    """
+    vector = np.frombuffer(blob, dtype=DEMOGRAPHIC_DTYPE)
+    if len(vector) < len(DEMOGRAPHIC_BUCKETS):
+        padding = np.full(len(DEMOGRAPHIC_BUCKETS) - len(vector), np.nan, dtype=DEMOGRAPHIC_DTYPE)
+        vector = np.concatenate([vector, padding])
+    return vector
+
+def demographic_matrix(data):
+    """
+    Stack the demographic vectors of processed ads into one matrix.
+
+    Args:
+        data (list): Processed ad data with a 'demographics' vector per ad
+
+    Returns:
+        numpy.ndarray: float32 matrix of shape (len(data), len(DEMOGRAPHIC_BUCKETS)), NaN where missing
+    """
+    matrix = np.full((len(data), len(DEMOGRAPHIC_BUCKETS)), np.nan, dtype=DEMOGRAPHIC_DTYPE)
+    for row, item in enumerate(data):
+        vector = item.get('demographics')
+        if vector is not None:
+            matrix[row] = vector
+    return matrix
+
+def demographic_values(vector):
+    """
+    Convert a demographic vector into a list of Python floats for export.
+
+    Returns:
+        list: One value per bucket, None where missing
+    """
+    if vector is None:
+        return [None] * len(DEMOGRAPHIC_BUCKETS)
+    values = np.round(vector.astype(np.float64), DEMOGRAPHIC_DECIMALS).tolist()
+    return [None if np.isnan(value) else value for value in values]
@@ -1,8 +1,49 @@
 """
 Excel export functionality for Meta Ads Library data.
 """
+import os
+import itertools
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+from src.utils.config import EXPORT_WIDTH_SAMPLE_ROWS, EXCEL_MAX_DATA_ROWS, EXCEL_SHARD_MODE
+from src.data.demographics import (
+    DEMOGRAPHIC_BUCKETS, DEMOGRAPHIC_DECIMALS, demographic_header, demographic_matrix, demographic_values
+)
+
+# Readable headers for the processed ad fields
+COLUMN_MAPPING = {
+    'id': 'Ad ID',
+    'page_id': 'Page ID',
+    'page_name': 'Page Name',
+    'ad_snapshot_url': 'Ad URL',
+    'ad_creative_body': 'Ad Text',
+    'start_date': 'Start Date',
+    'end_date': 'End Date',
+    'currency': 'Currency',
+    'spend': 'Spend',
+    'spend_lower': 'Spend Lower',
+    'spend_upper': 'Spend Upper',
+    'impressions': 'Impressions',
+    'impressions_lower': 'Impressions Lower',
+    'impressions_upper': 'Impressions Upper',
+    'platforms': 'Platforms',
+    'byline': 'Paid By'
+}
+
+# Widest column allowed on the Ad Data sheet
+MAX_COLUMN_WIDTH = 50
+
+# Headers of the Demographics sheet, one column per DEMOGRAPHIC_BUCKETS entry
+DEMOGRAPHIC_HEADERS = ['Ad ID', 'Page Name'] + [
+    demographic_header(age, gender) for age, gender in DEMOGRAPHIC_BUCKETS
+]
+
+def _write_shard_file(data, search_params, filename):
+    """Write one shard workbook. Runs in a worker process."""
+    return ExcelExporter().export_streaming(data, search_params, filename)
 
 class ExcelExporter:
     """Exports data to Excel format."""
@@ -36,7 +77,7 @@ class ExcelExporter:
             self._create_main_data_sheet(data)
             
             # Create demographics sheet if data available
-            if data and any(key.startswith('demo_') for key in data[0].keys()):
+            if any(item.get('demographics') is not None for item in data):
                 self._create_demographics_sheet(data)
             
             # Create search parameters sheet
@@ -44,31 +85,321 @@ class ExcelExporter:
             
         return filename
     
+    def export_streaming(self, rows, search_params, filename=None, sample_size=EXPORT_WIDTH_SAMPLE_ROWS):
+        """
+        Export data to Excel row by row using openpyxl's write-only mode.
+        
+        Rows are written as they are read from the iterable, so memory use
+        does not grow with the size of the export. Columns and widths are
+        derived from the first sample_size rows.
+        
+        Args:
+            rows (iterable): Processed ad data, e.g. a generator over pages
+            search_params (dict): Search parameters used
+            filename (str): Output filename (default: auto-generated)
+            sample_size (int): Number of leading rows used to pick columns and widths
+            
+        Returns:
+            str: Path to the saved Excel file
+        """
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"meta_ads_export_{timestamp}.xlsx"
+        
+        workbook = Workbook(write_only=True)
+        self._write_data_sheets(workbook, rows, 'Ad Data', 'Demographics', sample_size)
+        self._write_search_params_sheet(workbook, search_params)
+        workbook.save(filename)
+        return filename
+    
+    def export_sharded(self, data, search_params, filename=None, mode=EXCEL_SHARD_MODE,
+                       max_rows=EXCEL_MAX_DATA_ROWS, max_bytes=None, max_workers=None):
+        """
+        Export data that may exceed Excel's row limit, splitting it into shards.
+        
+        Data that fits into a single shard is exported with export_streaming.
+        Otherwise the rows are split into numbered sheets of one workbook, or
+        into numbered workbooks written in parallel processes, and an Index
+        sheet lists every shard.
+        
+        Args:
+            data (list): Processed ad data
+            search_params (dict): Search parameters used
+            filename (str): Output filename (default: auto-generated)
+            mode (str): 'sheets' for numbered sheets, 'files' for numbered files
+            max_rows (int): Maximum data rows per shard
+            max_bytes (int): Approximate size budget per shard (None for no limit)
+            max_workers (int): Processes writing file shards (None for one per CPU)
+            
+        Returns:
+            list: Paths of the written files, the index workbook first
+        """
+        if mode not in ('sheets', 'files'):
+            raise ValueError(f"Unsupported shard mode: {mode}")
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"meta_ads_export_{timestamp}.xlsx"
+        
+        shard_rows = self._get_shard_rows(data, max_rows, max_bytes)
+        if len(data) <= shard_rows:
+            return [self.export_streaming(data, search_params, filename)]
+        
+        shards = [(start, min(start + shard_rows, len(data))) for start in range(0, len(data), shard_rows)]
+        
+        if mode == 'sheets':
+            workbook = Workbook(write_only=True)
+            locations = [f"Ad Data {number}" for number in range(1, len(shards) + 1)]
+            self._write_index_sheet(workbook, self._shard_entries(data, shards, locations))
+            for number, (start, end) in enumerate(shards, 1):
+                self._write_data_sheets(
+                    workbook, itertools.islice(data, start, end),
+                    f"Ad Data {number}", f"Demographics {number}"
+                )
+            self._write_search_params_sheet(workbook, search_params)
+            workbook.save(filename)
+            return [filename]
+        
+        # One workbook per shard, written in parallel processes
+        base, ext = os.path.splitext(filename)
+        paths = [f"{base}_part{number:03d}{ext or '.xlsx'}" for number in range(1, len(shards) + 1)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_write_shard_file, data[start:end], search_params, path)
+                for (start, end), path in zip(shards, paths)
+            ]
+            for future in futures:
+                future.result()
+        
+        workbook = Workbook(write_only=True)
+        self._write_index_sheet(
+            workbook, self._shard_entries(data, shards, [os.path.basename(path) for path in paths])
+        )
+        self._write_search_params_sheet(workbook, search_params)
+        workbook.save(filename)
+        return [filename] + paths
+    
+    def export_rows_sharded(self, rows, search_params, filename=None, mode=EXCEL_SHARD_MODE,
+                            max_rows=EXCEL_MAX_DATA_ROWS):
+        """
+        Export rows from an iterable, starting a new shard whenever one is full.
+        
+        Unlike export_sharded, the rows are never collected: each one is
+        written as it is read, e.g. straight from PagePipeline.iter_rows(),
+        so memory use does not grow with the export. The files match those
+        of export_sharded: rows that fit into one shard give a single
+        workbook, more rows give numbered sheets of one workbook or numbered
+        workbooks, plus an Index sheet listing every shard.
+        
+        Args:
+            rows (iterable): Processed ad data
+            search_params (dict): Search parameters used
+            filename (str): Output filename (default: auto-generated)
+            mode (str): 'sheets' for numbered sheets, 'files' for numbered files
+            max_rows (int): Maximum data rows per shard
+            
+        Returns:
+            list: Paths of the written files, the index workbook first
+        """
+        if mode not in ('sheets', 'files'):
+            raise ValueError(f"Unsupported shard mode: {mode}")
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"meta_ads_export_{timestamp}.xlsx"
+        base, ext = os.path.splitext(filename)
+        
+        rows = iter(rows)
+        entries = []  # [location, first row, last row, first ad id, last ad id] per shard
+        first_sheets = ()
+        paths = []
+        workbook = Workbook(write_only=True)
+        
+        while True:
+            first = next(rows, None)
+            if first is None and entries:
+                break
+            number = len(entries) + 1
+            
+            if number == 2:
+                # More than one shard after all: number the first one as well
+                if mode == 'sheets':
+                    for sheet in first_sheets:
+                        if sheet is not None:
+                            sheet.title = f"{sheet.title} 1"
+                    entries[0][0] = first_sheets[0].title
+                else:
+                    paths.append(f"{base}_part001{ext or '.xlsx'}")
+                    os.replace(filename, paths[0])
+                    entries[0][0] = os.path.basename(paths[0])
+            
+            start = entries[-1][2] if entries else 0
+            entry = [None, start + 1, start, first.get('id') if first is not None else None, None]
+            entries.append(entry)
+            
+            def tracked(chunk, entry=entry):
+                for item in chunk:
+                    entry[2] += 1
+                    entry[4] = item.get('id')
+                    yield item
+            
+            chunk = tracked(itertools.chain([first], itertools.islice(rows, max_rows - 1)) if first is not None else ())
+            if mode == 'sheets':
+                suffix = f" {number}" if number > 1 else ""
+                sheets = self._write_data_sheets(workbook, chunk, f"Ad Data{suffix}", f"Demographics{suffix}")
+                entry[0] = sheets[0].title
+                if number == 1:
+                    first_sheets = sheets
+            else:
+                path = filename if number == 1 else f"{base}_part{number:03d}{ext or '.xlsx'}"
+                if number > 1:
+                    paths.append(path)
+                    workbook = Workbook(write_only=True)
+                self._write_data_sheets(workbook, chunk, 'Ad Data', 'Demographics')
+                self._write_search_params_sheet(workbook, search_params)
+                workbook.save(path)
+                entry[0] = os.path.basename(path)
+        
+        if mode == 'sheets':
+            if len(entries) > 1:
+                self._write_index_sheet(workbook, entries, index=0)
+            self._write_search_params_sheet(workbook, search_params)
+            workbook.save(filename)
+            return [filename]
+        
+        if len(entries) > 1:
+            workbook = Workbook(write_only=True)
+            self._write_index_sheet(workbook, entries)
+            self._write_search_params_sheet(workbook, search_params)
+            workbook.save(filename)
+        return [filename] + paths
+    
+    def _get_shard_rows(self, data, max_rows, max_bytes):
+        """Get the number of rows per shard from the row limit and byte budget."""
+        shard_rows = max_rows
+        if max_bytes and data:
+            # Estimate the size of a row from a bounded sample
+            sample = data[:EXPORT_WIDTH_SAMPLE_ROWS]
+            sample_bytes = sum(len(str(value)) for item in sample for value in item.values())
+            average_bytes = max(1, sample_bytes // len(sample))
+            shard_rows = min(shard_rows, max(1, max_bytes // average_bytes))
+        return shard_rows
+    
+    def _shard_entries(self, data, shards, locations):
+        """Describe the (start, end) row ranges of data for the Index sheet."""
+        return [
+            [location, start + 1, end, data[start].get('id'), data[end - 1].get('id')]
+            for (start, end), location in zip(shards, locations)
+        ]
+    
+    def _write_index_sheet(self, workbook, entries, index=None):
+        """
+        Create the sheet listing every shard and the rows it holds.
+        
+        Args:
+            workbook (Workbook): Write-only workbook
+            entries (list): [location, first row, last row, first ad id, last ad id] per shard
+            index (int): Position of the sheet (default: after the existing sheets)
+        """
+        headers = ['Shard', 'Location', 'First Row', 'Last Row', 'Rows', 'First Ad ID', 'Last Ad ID']
+        rows = [
+            [number, location, first_row, last_row, last_row - first_row + 1, first_id, last_id]
+            for number, (location, first_row, last_row, first_id, last_id) in enumerate(entries, 1)
+        ]
+        
+        index_sheet = workbook.create_sheet('Index', index)
+        self._set_sample_widths(index_sheet, headers, rows)
+        index_sheet.append(headers)
+        for row in rows:
+            index_sheet.append(row)
+    
+    def _write_data_sheets(self, workbook, rows, main_title, demo_title, sample_size=EXPORT_WIDTH_SAMPLE_ROWS):
+        """
+        Stream rows into a main data sheet and, if present, a demographics sheet.
+        
+        Returns:
+            tuple: The main sheet and the demographics sheet (None if not created)
+        """
+        rows = iter(rows)
+        sample = list(itertools.islice(rows, sample_size))
+        
+        # Discover the columns from the sample, keeping their first-seen order
+        columns = {}
+        for item in sample:
+            columns.update(dict.fromkeys(item.keys()))
+        main_columns = [col for col in columns if col != 'demographics']
+        
+        # Main data sheet
+        main_sheet = workbook.create_sheet(main_title)
+        main_headers = [COLUMN_MAPPING.get(col, col) for col in main_columns]
+        self._set_sample_widths(
+            main_sheet, main_headers,
+            ([item.get(col) for col in main_columns] for item in sample),
+            MAX_COLUMN_WIDTH
+        )
+        main_sheet.append(main_headers)
+        
+        # Stream the rows: the sample first, then the rest of the iterable
+        demo_sheet = None
+        for item in itertools.chain(sample, rows):
+            main_sheet.append([item.get(col) for col in main_columns])
+            if item.get('demographics') is None:
+                continue
+            
+            # The Demographics sheet is created with the first ad that has a vector,
+            # wherever it is; its columns are fixed, so no sample is needed for them
+            if demo_sheet is None:
+                demo_sheet = workbook.create_sheet(demo_title)
+                self._set_sample_widths(
+                    demo_sheet, DEMOGRAPHIC_HEADERS,
+                    [self._demographic_row(item)] + [
+                        self._demographic_row(other) for other in sample if other.get('demographics') is not None
+                    ]
+                )
+                demo_sheet.append(DEMOGRAPHIC_HEADERS)
+            demo_sheet.append(self._demographic_row(item))
+        return main_sheet, demo_sheet
+    
+    def _demographic_row(self, item):
+        """Get the Demographics sheet row of an ad."""
+        return [item.get('id'), item.get('page_name')] + demographic_values(item.get('demographics'))
+    
+    def _write_search_params_sheet(self, workbook, search_params):
+        """Create the search parameters sheet in a write-only workbook."""
+        params_sheet = workbook.create_sheet('Search Parameters')
+        params_rows = [[k, str(v)] for k, v in search_params.items()]
+        self._set_sample_widths(params_sheet, ['Parameter', 'Value'], params_rows)
+        params_sheet.append(['Parameter', 'Value'])
+        for row in params_rows:
+            params_sheet.append(row)
+    
+    def _set_sample_widths(self, worksheet, headers, sample_rows, max_width=None):
+        """
+        Size the columns of a write-only sheet from its headers and a sample of rows.
+        
+        Write-only sheets cannot be measured after writing, so this must be
+        called before the first row is appended.
+        """
+        widths = [len(str(header)) for header in headers]
+        for row in sample_rows:
+            for i, value in enumerate(row):
+                if value is not None:
+                    widths[i] = max(widths[i], len(str(value)))
+        
+        for i, width in enumerate(widths):
+            adjusted_width = width + 2
+            if max_width:
+                adjusted_width = min(adjusted_width, max_width)
+            worksheet.column_dimensions[get_column_letter(i + 1)].width = adjusted_width
+    
     def _create_main_data_sheet(self, data):
         """Create the main data sheet."""
-        # Filter out demographic columns for the main sheet
-        main_columns = [col for col in data[0].keys() if not col.startswith('demo_')]
+        # Filter out the demographic vector for the main sheet
+        main_columns = [col for col in data[0].keys() if col != 'demographics']
         
         # Create DataFrame with only main columns
         df = pd.DataFrame([{k: v for k, v in item.items() if k in main_columns} for item in data])
         
         # Rename columns for better readability
-        column_mapping = {
-            'id': 'Ad ID',
-            'page_id': 'Page ID',
-            'page_name': 'Page Name',
-            'ad_snapshot_url': 'Ad URL',
-            'ad_creative_body': 'Ad Text',
-            'start_date': 'Start Date',
-            'end_date': 'End Date',
-            'currency': 'Currency',
-            'spend': 'Spend',
-            'impressions': 'Impressions',
-            'platforms': 'Platforms',
-            'byline': 'Paid By'
-        }
-        
-        df = df.rename(columns=column_mapping)
+        df = df.rename(columns=COLUMN_MAPPING)
         
         # Write to Excel
         df.to_excel(self.writer, sheet_name='Ad Data', index=False)
@@ -81,34 +412,18 @@ class ExcelExporter:
                 len(col)
             )
             # Cap width at 50 characters
-            adjusted_width = min(max_width + 2, 50)
-            worksheet.column_dimensions[chr(65 + i)].width = adjusted_width
+            adjusted_width = min(max_width + 2, MAX_COLUMN_WIDTH)
+            worksheet.column_dimensions[get_column_letter(i + 1)].width = adjusted_width
     
     def _create_demographics_sheet(self, data):
         """Create the demographics sheet."""
-        # Extract only demographic columns
-        demo_columns = [col for col in data[0].keys() if col.startswith('demo_')]
-        
-        if not demo_columns:
-            return
-            
-        # Create DataFrame with demographic data and ad identifiers
-        df = pd.DataFrame([
-            {**{'Ad ID': item['id'], 'Page Name': item['page_name']}, 
-             **{k: v for k, v in item.items() if k in demo_columns}}
-            for item in data
-        ])
-        
-        # Rename demographic columns for better readability
-        column_mapping = {}
-        for col in demo_columns:
-            parts = col.replace('demo_', '').split('_')
-            if len(parts) >= 2:
-                age = parts[0].replace('plus', '+')
-                gender = parts[1].capitalize()
-                column_mapping[col] = f"{age} {gender}"
-        
-        df = df.rename(columns=column_mapping)
+        # Build the frame from the whole demographic matrix at once
+        df = pd.DataFrame(
+            demographic_matrix(data).astype('float64').round(DEMOGRAPHIC_DECIMALS),
+            columns=DEMOGRAPHIC_HEADERS[2:]
+        )
+        df.insert(0, 'Page Name', [item['page_name'] for item in data])
+        df.insert(0, 'Ad ID', [item['id'] for item in data])
         
         # Write to Excel
         df.to_excel(self.writer, sheet_name='Demographics', index=False)
@@ -120,7 +435,7 @@ class ExcelExporter:
                 df[col].astype(str).map(len).max(),
                 len(col)
             )
-            worksheet.column_dimensions[chr(65 + i)].width = max_width + 2
+            worksheet.column_dimensions[get_column_letter(i + 1)].width = max_width + 2
     
     def _create_search_params_sheet(self, search_params):
         """Create a sheet with search parameters."""
@@ -140,4 +455,4 @@ class ExcelExporter:
                 df[col].astype(str).map(len).max(),
                 len(col)
             )
-            worksheet.column_dimensions[chr(65 + i)].width = max_width + 2
+            worksheet.column_dimensions[get_column_letter(i + 1)].width = max_width + 2
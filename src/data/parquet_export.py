@@ -0,0 +1,256 @@
+"""
+Parquet and Arrow IPC export functionality for Meta Ads Library data.
+"""
+import os
+from datetime import datetime, date
+import numpy as np
+from src.utils.config import PARQUET_ROW_GROUP_SIZE, PARQUET_COMPRESSION
+from src.data.demographics import DEMOGRAPHIC_BUCKETS, demographic_matrix
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+# File extension of each supported format
+FILE_EXTENSIONS = {
+    'parquet': '.parquet',
+    'arrow': '.arrow'
+}
+
+def _main_schema(columns=None):
+    """
+    Schema of the main ad table.
+    
+    Args:
+        columns (iterable): Only include these columns (None for all)
+    """
+    schema = pa.schema([
+        ('id', pa.string()),
+        ('page_id', pa.string()),
+        ('page_name', pa.string()),
+        ('ad_snapshot_url', pa.string()),
+        ('ad_creative_body', pa.string()),
+        ('start_date', pa.date32()),
+        ('end_date', pa.date32()),
+        ('currency', pa.dictionary(pa.int16(), pa.string())),
+        ('spend', pa.string()),
+        ('spend_lower', pa.int64()),
+        ('spend_upper', pa.int64()),
+        ('impressions', pa.string()),
+        ('impressions_lower', pa.int64()),
+        ('impressions_upper', pa.int64()),
+        ('platforms', pa.string()),
+        ('byline', pa.string())
+    ])
+    if columns is None:
+        return schema
+    columns = set(columns)
+    return pa.schema([field for field in schema if field.name in columns])
+
+def _demographics_schema():
+    """Schema of the demographics table, one row per ad and bucket."""
+    return pa.schema([
+        ('id', pa.string()),
+        ('age', pa.dictionary(pa.int8(), pa.string())),
+        ('gender', pa.dictionary(pa.int8(), pa.string())),
+        ('percentage', pa.float32())
+    ])
+
+def _search_params_schema():
+    """Schema of the search parameters table."""
+    return pa.schema([
+        ('parameter', pa.string()),
+        ('value', pa.string())
+    ])
+
+def _parse_date(value):
+    """Parse the date part of an API timestamp, or None if missing."""
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+class ParquetExporter:
+    """
+    Exports data to Parquet or Arrow IPC files.
+    
+    Three files are written next to each other: the main ad table, a
+    demographics table in long format (one row per ad, age and gender)
+    and the search parameters. Pages can be appended as they arrive with
+    open(), write_page() and close(); rows are buffered into row groups
+    of row_group_size. The main table only has the columns present in the
+    first page, so exports of a reduced field profile stay narrow.
+    """
+    
+    def __init__(self, file_format='parquet', compression=PARQUET_COMPRESSION,
+                 row_group_size=PARQUET_ROW_GROUP_SIZE):
+        """
+        Initialize the exporter.
+        
+        Args:
+            file_format (str): 'parquet' or 'arrow' (Arrow IPC file)
+            compression (str): Compression codec, e.g. 'zstd', 'snappy' or None
+            row_group_size (int): Rows per Parquet row group / Arrow record batch
+        """
+        if pa is None:
+            raise ImportError("ParquetExporter requires the 'pyarrow' package")
+        if file_format not in FILE_EXTENSIONS:
+            raise ValueError(f"Unsupported format: {file_format}")
+        
+        self.file_format = file_format
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.paths = None
+        self.search_params = {}
+        self._writers = {}
+        self._buffers = {}
+        self._schemas = {}
+    
+    def export(self, data, search_params, filename=None):
+        """
+        Export data in one call.
+        
+        Args:
+            data (iterable): Processed ad data
+            search_params (dict): Search parameters used
+            filename (str): Path of the main table (default: auto-generated)
+            
+        Returns:
+            dict: Paths of the written tables, keyed by table name
+        """
+        self.open(filename, search_params)
+        try:
+            self.write_page(data)
+        finally:
+            paths = self.close()
+        return paths
+    
+    def open(self, filename=None, search_params=None):
+        """
+        Start an export that pages are appended to.
+        
+        Args:
+            filename (str): Path of the main table (default: auto-generated)
+            search_params (dict): Search parameters used
+            
+        Returns:
+            dict: Paths the tables will be written to, keyed by table name
+        """
+        extension = FILE_EXTENSIONS[self.file_format]
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"meta_ads_export_{timestamp}{extension}"
+        
+        base, ext = os.path.splitext(filename)
+        ext = ext or extension
+        self.paths = {
+            'main': f"{base}{ext}",
+            'demographics': f"{base}_demographics{ext}",
+            'search_params': f"{base}_search_params{ext}"
+        }
+        self.search_params = search_params or {}
+        self._writers = {}
+        self._buffers = {'main': [], 'demographics': []}
+        self._schemas = {'main': None, 'demographics': _demographics_schema()}
+        return self.paths
+    
+    def write_page(self, data):
+        """
+        Append a page of processed ads to the export.
+        
+        Args:
+            data (iterable): Processed ad data
+        """
+        if self.paths is None:
+            raise RuntimeError("Call open() before write_page()")
+        
+        data = list(data)
+        if self._schemas['main'] is None and data:
+            self._schemas['main'] = _main_schema(data[0].keys())
+        main_rows = self._buffers['main']
+        for item in data:
+            main_rows.append({
+                **item,
+                'start_date': _parse_date(item.get('start_date')),
+                'end_date': _parse_date(item.get('end_date'))
+            })
+        
+        # Long format from the page's demographic matrix: one row per filled bucket
+        matrix = demographic_matrix(data)
+        rows, buckets = np.nonzero(~np.isnan(matrix))
+        self._buffers['demographics'].extend(
+            {
+                'id': data[row].get('id'),
+                'age': DEMOGRAPHIC_BUCKETS[bucket][0],
+                'gender': DEMOGRAPHIC_BUCKETS[bucket][1],
+                'percentage': percentage
+            }
+            for row, bucket, percentage in zip(rows.tolist(), buckets.tolist(), matrix[rows, buckets].tolist())
+        )
+        
+        self._flush(full_groups_only=True)
+    
+    def close(self):
+        """
+        Finish the export and close all files.
+        
+        Returns:
+            dict: Paths of the written tables, keyed by table name
+        """
+        if self.paths is None:
+            raise RuntimeError("Call open() before close()")
+        
+        try:
+            self._flush(full_groups_only=False)
+            
+            # Make sure every table exists, even when no rows were written
+            self._get_writer('main', self._schemas['main'] or _main_schema())
+            self._get_writer('demographics', self._schemas['demographics'])
+            
+            params_table = pa.Table.from_pylist(
+                [{'parameter': k, 'value': str(v)} for k, v in self.search_params.items()],
+                schema=_search_params_schema()
+            )
+            self._get_writer('search_params', _search_params_schema()).write_table(params_table)
+        finally:
+            for writer in self._writers.values():
+                writer.close()
+        
+        paths = self.paths
+        self.paths = None
+        self._writers = {}
+        self._buffers = {}
+        self._schemas = {}
+        return paths
+    
+    def _flush(self, full_groups_only):
+        """Write buffered rows, optionally only as many whole row groups as are ready."""
+        for name, rows in self._buffers.items():
+            if full_groups_only:
+                count = len(rows) - len(rows) % self.row_group_size
+            else:
+                count = len(rows)
+            if not count:
+                continue
+            
+            table = pa.Table.from_pylist(rows[:count], schema=self._schemas[name])
+            self._get_writer(name, self._schemas[name]).write_table(table, self.row_group_size)
+            del rows[:count]
+    
+    def _get_writer(self, name, schema):
+        """Get the writer of a table, creating the file on first use."""
+        if name not in self._writers:
+            path = self.paths[name]
+            if self.file_format == 'parquet':
+                self._writers[name] = pq.ParquetWriter(path, schema, compression=self.compression)
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                self._writers[name] = pa.ipc.new_file(path, schema, options=options)
+        return self._writers[name]
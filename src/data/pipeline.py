@@ -0,0 +1,77 @@
+"""
+Incremental processing of Meta Ads Library API pages.
+"""
+from src.data.processor import DataProcessor
+
+class PagePipeline:
+    """
+    Processes API pages as they arrive instead of after the whole search.
+
+    Each page is processed as soon as it is fetched, appended to the
+    processor's output, handed to every sink and then dropped, so raw
+    payloads of earlier pages are not kept alive unless the processor is
+    created with keep_raw. A sink is any object with a write_page(data)
+    method, such as ParquetExporter; sinks with a true accepts_raw
+    attribute, such as AdStore, also get the raw page as raw_data.
+    With a DedupIndex, ads already seen are dropped before processing.
+    """
+
+    def __init__(self, processor=None, sinks=None, keep_raw=False, dedup=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            processor (DataProcessor): Processor collecting the output (default: a new one)
+            sinks (list): Objects whose write_page() receives every processed page
+            keep_raw (bool): Keep raw payloads when creating the default processor
+            dedup (DedupIndex): Index dropping ads already seen, e.g. by other queries
+        """
+        self.processor = processor or DataProcessor(keep_raw=keep_raw)
+        self.sinks = list(sinks or [])
+        self.dedup = dedup
+        self.page_count = 0
+        self.ad_count = 0
+
+    def run(self, pages, max_results=None, query=None):
+        """
+        Process pages from an iterable as they arrive.
+
+        Args:
+            pages (iterable): Pages of raw ads, e.g. APIClient.iter_pages()
+            max_results (int): Stop after this many ads (None for no limit)
+            query: Key the dedup index records duplicate counts under
+
+        Yields:
+            list: Processed ads of each page, after the sinks received them
+        """
+        self.page_count = 0
+        self.ad_count = 0
+
+        for page in pages:
+            if self.dedup is not None:
+                page = self.dedup.filter_new(page, query)
+            if max_results is not None:
+                page = page[:max(0, max_results - self.ad_count)]
+
+            processed_page = self.processor.process_page(page)
+            for sink in self.sinks:
+                if getattr(sink, 'accepts_raw', False):
+                    sink.write_page(processed_page, raw_data=page)
+                else:
+                    sink.write_page(processed_page)
+
+            self.page_count += 1
+            self.ad_count += len(processed_page)
+            yield processed_page
+
+            if max_results is not None and self.ad_count >= max_results:
+                break
+
+    def iter_rows(self, pages, max_results=None):
+        """
+        Process pages and yield the processed ads one by one.
+
+        Useful to feed ExcelExporter.export_streaming directly from the API.
+        """
+        for processed_page in self.run(pages, max_results):
+            yield from processed_page
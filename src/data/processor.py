@@ -2,14 +2,65 @@
 Data processor for Meta Ads Library API results.
 """
 import json
+from src.data.demographics import demographic_vector
+
+# Processed columns derived from each requested API field; 'id' is always returned
+FIELD_COLUMNS = {
+    'id': ['id'],
+    'page_id': ['page_id'],
+    'page_name': ['page_name'],
+    'ad_snapshot_url': ['ad_snapshot_url'],
+    'ad_creative_bodies': ['ad_creative_body'],
+    'ad_delivery_start_time': ['start_date'],
+    'ad_delivery_stop_time': ['end_date'],
+    'currency': ['currency'],
+    'spend': ['spend', 'spend_lower', 'spend_upper'],
+    'impressions': ['impressions', 'impressions_lower', 'impressions_upper'],
+    'publisher_platforms': ['platforms'],
+    'bylines': ['byline'],
+    'demographic_distribution': ['demographics']
+}
+
+def columns_for_fields(fields):
+    """
+    Get the processed columns that a set of requested API fields produces.
+    
+    Args:
+        fields (str or list): Comma-separated or listed API fields, None for all
+        
+    Returns:
+        set: Column names, or None for all columns
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    columns = {'id'}
+    for field in fields:
+        columns.update(FIELD_COLUMNS.get(field.strip(), []))
+    return columns
 
 class DataProcessor:
     """Processes data from the Meta Ads Library API."""
     
-    def __init__(self):
-        """Initialize the data processor."""
+    def __init__(self, keep_raw=True, fields=None):
+        """
+        Initialize the data processor.
+        
+        Args:
+            keep_raw (bool): Keep the raw API payloads in raw_data next to the processed data
+            fields (str or list): API fields that were requested; only their columns
+                are produced (None for all columns)
+        """
+        self.keep_raw = keep_raw
         self.raw_data = []
         self.processed_data = []
+        self.set_fields(fields)
+    
+    def set_fields(self, fields):
+        """Produce only the columns of the given API fields (None for all columns)."""
+        self.fields = fields
+        self.columns = columns_for_fields(fields)
         
     def process_ads_data(self, ads_data):
         """
@@ -21,7 +72,7 @@ class DataProcessor:
         Returns:
             list: Processed data
         """
-        self.raw_data = ads_data
+        self.raw_data = ads_data if self.keep_raw else []
         self.processed_data = []
         
         for ad in ads_data:
@@ -30,8 +81,37 @@ class DataProcessor:
             
         return self.processed_data
     
+    def process_page(self, ads_data):
+        """
+        Process one page of raw ads and append it to the processed data.
+        
+        The raw page is only kept when keep_raw is set, so callers can drop
+        it as soon as this returns.
+        
+        Args:
+            ads_data (list): Ads of a single API page
+            
+        Returns:
+            list: Processed ads of this page
+        """
+        if self.keep_raw:
+            self.raw_data.extend(ads_data)
+        
+        processed_page = [self._process_single_ad(ad) for ad in ads_data]
+        self.processed_data.extend(processed_page)
+        return processed_page
+    
+    def reset(self):
+        """Drop all raw and processed data, e.g. before a new search."""
+        self.raw_data = []
+        self.processed_data = []
+    
     def _process_single_ad(self, ad):
         """Process a single ad record."""
+        # Numeric bounds for sorting and aggregation; spend/impressions are display strings
+        spend_lower, spend_upper = self._extract_range_bounds(ad.get('spend'))
+        impressions_lower, impressions_upper = self._extract_range_bounds(ad.get('impressions'))
+        
         processed = {
             'id': ad.get('id', ''),
             'page_id': ad.get('page_id', ''),
@@ -42,15 +122,20 @@ class DataProcessor:
             'end_date': ad.get('ad_delivery_stop_time', ''),
             'currency': ad.get('currency', ''),
             'spend': self._extract_range_value(ad.get('spend', {})),
+            'spend_lower': spend_lower,
+            'spend_upper': spend_upper,
             'impressions': self._extract_range_value(ad.get('impressions', {})),
+            'impressions_lower': impressions_lower,
+            'impressions_upper': impressions_upper,
             'platforms': ', '.join(ad.get('publisher_platforms', [])),
             'byline': ad.get('bylines', ''),
+            # Fixed age x gender vector indexed by DEMOGRAPHIC_BUCKETS, None if not available
+            'demographics': demographic_vector(ad.get('demographic_distribution')),
         }
         
-        # Process demographic data if available
-        if 'demographic_distribution' in ad:
-            demographics = self._process_demographics(ad['demographic_distribution'])
-            processed.update(demographics)
+        # Leave out the columns of fields that were not requested
+        if self.columns is not None:
+            processed = {key: value for key, value in processed.items() if key in self.columns}
             
         return processed
     
@@ -81,19 +166,28 @@ class DataProcessor:
                 
         return str(range_data)
     
-    def _process_demographics(self, demographic_data):
-        """Process demographic distribution data."""
-        result = {}
+    def _extract_range_bounds(self, range_data):
+        """
+        Extract the numeric bounds of a range object.
         
-        for item in demographic_data:
-            age = item.get('age', '')
-            gender = item.get('gender', '')
-            percentage = item.get('percentage', '')
-            
-            key = f"demo_{age}_{gender}".lower().replace('+', 'plus')
-            result[key] = percentage
-            
-        return result
+        Returns:
+            tuple: (lower, upper) as integers, None for a missing bound
+        """
+        if not isinstance(range_data, dict):
+            return None, None
+        return (
+            self._parse_bound(range_data.get('lower_bound')),
+            self._parse_bound(range_data.get('upper_bound'))
+        )
+    
+    def _parse_bound(self, value):
+        """Parse a range bound into an integer, or None if missing or invalid."""
+        if value in (None, ''):
+            return None
+        try:
+            return int(round(float(value)))
+        except (TypeError, ValueError):
+            return None
     
     def get_preview_data(self, limit=10):
         """Get a preview of the processed data."""
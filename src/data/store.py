@@ -0,0 +1,380 @@
+"""
+Local SQLite store of processed Meta Ads Library results.
+"""
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from src.utils.config import STORE_PATH, STORE_RAW_JSON
+from src.data.demographics import DEMOGRAPHIC_DTYPE, demographic_from_bytes
+from src.api.checkpoint import CheckpointStore
+
+# Processed ad fields stored as columns of the ads table, with their SQL types
+AD_COLUMNS = [
+    ('id', 'TEXT PRIMARY KEY'),
+    ('page_id', 'TEXT'),
+    ('page_name', 'TEXT'),
+    ('ad_snapshot_url', 'TEXT'),
+    ('ad_creative_body', 'TEXT'),
+    ('start_date', 'TEXT'),
+    ('end_date', 'TEXT'),
+    ('currency', 'TEXT'),
+    ('spend', 'TEXT'),
+    ('spend_lower', 'INTEGER'),
+    ('spend_upper', 'INTEGER'),
+    ('impressions', 'TEXT'),
+    ('impressions_lower', 'INTEGER'),
+    ('impressions_upper', 'INTEGER'),
+    ('platforms', 'TEXT'),
+    ('byline', 'TEXT')
+]
+
+_AD_FIELDS = [name for name, _ in AD_COLUMNS]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS ads (
+    {', '.join(f'{name} {sql_type}' for name, sql_type in AD_COLUMNS)},
+    demographics BLOB,
+    raw_json TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_ads (
+    job_id TEXT NOT NULL,
+    ad_id TEXT NOT NULL,
+    PRIMARY KEY (job_id, ad_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS syncs (
+    search_hash TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    max_start_date TEXT,
+    last_run_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ads_page_id ON ads (page_id);
+CREATE INDEX IF NOT EXISTS idx_ads_start_date ON ads (start_date);
+CREATE INDEX IF NOT EXISTS idx_ads_spend ON ads (spend_lower, spend_upper);
+CREATE INDEX IF NOT EXISTS idx_job_ads_ad_id ON job_ads (ad_id);
+"""
+
+# Upsert keyed by ad id: later fetches refresh the fields, first_seen is kept.
+# Missing values (fields outside the requested field profile, no raw payload)
+# do not overwrite stored ones
+_UPSERT_AD = f"""
+INSERT INTO ads ({', '.join(_AD_FIELDS)}, demographics, raw_json, first_seen, last_seen)
+VALUES ({', '.join('?' * (len(_AD_FIELDS) + 4))})
+ON CONFLICT (id) DO UPDATE SET
+    {', '.join(f'{name} = COALESCE(excluded.{name}, ads.{name})' for name in _AD_FIELDS[1:])},
+    demographics = COALESCE(excluded.demographics, ads.demographics),
+    raw_json = COALESCE(excluded.raw_json, ads.raw_json),
+    last_seen = excluded.last_seen
+"""
+
+# Ids looked up per query, below SQLite's bound parameter limit
+_LOOKUP_CHUNK = 500
+
+class AdStore:
+    """
+    Keeps processed ads in a local SQLite database.
+
+    Ads are upserted by id, so repeated and overlapping searches only add
+    what is new. Each search is recorded as a job together with the ids
+    it returned. The database runs in WAL mode so it can be queried while
+    a search is writing to it. An AdStore can be used as a PagePipeline
+    sink; in that case it also receives the raw payloads.
+    """
+
+    def __init__(self, path=STORE_PATH, store_raw=STORE_RAW_JSON):
+        """
+        Open the store, creating the database if needed.
+
+        Args:
+            path (str): Database file, or ':memory:'
+            store_raw (bool): Keep the raw API payload of each ad
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.path = path
+        self.accepts_raw = store_raw
+        self.job_id = None
+        self._lock = threading.Lock()
+
+        # Searches write from a worker thread; the lock serializes access
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def start_job(self, search_params, job_id=None):
+        """
+        Record a new search; pages written afterwards are linked to it.
+
+        Args:
+            search_params (dict): Search parameters (the access token is not stored)
+            job_id (str): Job identifier (default: a new one)
+
+        Returns:
+            str: The job identifier
+        """
+        self.job_id = self.add_job(search_params, job_id)
+        return self.job_id
+
+    def add_job(self, search_params, job_id=None):
+        """
+        Record a search without making it the current job.
+
+        Used when several searches write concurrently and pass their
+        job_id to write_page()/merge_page() explicitly.
+
+        Returns:
+            str: The job identifier
+        """
+        job_id = job_id or CheckpointStore.new_job_id()
+        params = {k: v for k, v in search_params.items() if k != 'access_token'}
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, params, started_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(params, sort_keys=True, default=str), datetime.now().isoformat())
+            )
+        return job_id
+
+    def write_page(self, data, raw_data=None, job_id=None):
+        """
+        Upsert a page of processed ads.
+
+        Args:
+            data (list): Processed ad data
+            raw_data (list): Raw API ads aligned with data, stored when store_raw is set
+            job_id (str): Job the ads are linked to (default: the current job)
+
+        Returns:
+            int: Number of ads written
+        """
+        now = datetime.now().isoformat()
+        if raw_data is None or not self.accepts_raw:
+            raw_data = [None] * len(data)
+
+        rows = [self._ad_row(item, raw, now) for item, raw in zip(data, raw_data)]
+        with self._lock, self._connection:
+            self._connection.executemany(_UPSERT_AD, rows)
+            self._link_job(data, job_id or self.job_id)
+        return len(rows)
+
+    def merge_page(self, data, raw_data=None, job_id=None):
+        """
+        Merge a page of processed ads, writing only what is new or changed.
+
+        Ads whose stored fields and demographics are identical only get
+        their last_seen time refreshed.
+
+        Args:
+            data (list): Processed ad data
+            raw_data (list): Raw API ads aligned with data, stored when store_raw is set
+            job_id (str): Job the ads are linked to (default: the current job)
+
+        Returns:
+            dict: Number of 'inserted', 'updated' and 'unchanged' ads
+        """
+        now = datetime.now().isoformat()
+        if raw_data is None or not self.accepts_raw:
+            raw_data = [None] * len(data)
+
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        changed_rows, unchanged_ids = [], []
+        with self._lock, self._connection:
+            stored = self._get_stored_values([item.get('id') for item in data])
+            for item, raw in zip(data, raw_data):
+                row = self._ad_row(item, raw, now)
+                # Compare the ad fields and the demographics blob; missing values keep the stored ones
+                values = row[:len(_AD_FIELDS) + 1]
+                previous = stored.get(item.get('id'))
+                if previous is None:
+                    counts['inserted'] += 1
+                    changed_rows.append(row)
+                elif any(new is not None and new != old for new, old in zip(values, previous)):
+                    counts['updated'] += 1
+                    changed_rows.append(row)
+                else:
+                    counts['unchanged'] += 1
+                    unchanged_ids.append((now, item.get('id')))
+
+            self._connection.executemany(_UPSERT_AD, changed_rows)
+            self._connection.executemany("UPDATE ads SET last_seen = ? WHERE id = ?", unchanged_ids)
+            self._link_job(data, job_id or self.job_id)
+        return counts
+
+    def link_ads(self, data, job_id=None):
+        """
+        Link ads to a job without writing them, e.g. ads another job already stored.
+
+        Args:
+            data (list): Raw or processed ads with an 'id'
+            job_id (str): Job the ads are linked to (default: the current job)
+        """
+        with self._lock, self._connection:
+            self._link_job(data, job_id or self.job_id)
+
+    def get_sync_state(self, search_hash):
+        """
+        Get the state of the last successful sync of a saved search.
+
+        Returns:
+            dict: params, max_start_date and last_run_at, or None if never synced
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT params, max_start_date, last_run_at FROM syncs WHERE search_hash = ?",
+                (search_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), 'params': json.loads(row['params'])}
+
+    def save_sync_state(self, search_hash, search_params, max_start_date):
+        """
+        Record a successful sync of a saved search.
+
+        Args:
+            search_hash (str): Identifier of the saved search, see params_hash()
+            search_params (dict): Search parameters (the access token is not stored)
+            max_start_date (str): Latest ad_delivery_start_time seen so far
+        """
+        params = {k: v for k, v in search_params.items() if k != 'access_token'}
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO syncs (search_hash, params, max_start_date, last_run_at) "
+                "VALUES (?, ?, ?, ?)",
+                (search_hash, json.dumps(params, sort_keys=True, default=str),
+                 max_start_date, datetime.now().isoformat())
+            )
+
+    def get_ads(self, page_id=None, start_date_min=None, start_date_max=None,
+                min_spend=None, job_id=None, limit=None):
+        """
+        Query stored ads.
+
+        Args:
+            page_id (str): Only ads of this page
+            start_date_min (str): Only ads starting on or after this date (YYYY-MM-DD)
+            start_date_max (str): Only ads starting on or before this date (YYYY-MM-DD)
+            min_spend (int): Only ads whose lower spend bound is at least this much
+            job_id (str): Only ads returned by this search job
+            limit (int): Maximum number of ads
+
+        Returns:
+            list: Processed ad data, newest start date first
+        """
+        conditions, args = [], []
+        if page_id is not None:
+            conditions.append("ads.page_id = ?")
+            args.append(page_id)
+        if start_date_min:
+            conditions.append("ads.start_date >= ?")
+            args.append(start_date_min)
+        if start_date_max:
+            # Stored dates are timestamps, so compare against the start of the next day
+            conditions.append("ads.start_date < date(?, '+1 day')")
+            args.append(start_date_max)
+        if min_spend is not None:
+            conditions.append("ads.spend_lower >= ?")
+            args.append(min_spend)
+        if job_id is not None:
+            conditions.append("ads.id IN (SELECT ad_id FROM job_ads WHERE job_id = ?)")
+            args.append(job_id)
+
+        query = f"SELECT {', '.join(_AD_FIELDS)}, demographics FROM ads"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY ads.start_date DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(query, args).fetchall()
+        return [self._row_to_ad(row) for row in rows]
+
+    def get_raw(self, ad_id):
+        """Get the stored raw API payload of an ad, or None."""
+        with self._lock:
+            row = self._connection.execute("SELECT raw_json FROM ads WHERE id = ?", (ad_id,)).fetchone()
+        if row is None or row['raw_json'] is None:
+            return None
+        return json.loads(row['raw_json'])
+
+    def list_jobs(self):
+        """
+        List the recorded search jobs, newest first.
+
+        Returns:
+            list: Dicts with job_id, params, started_at and ad_count
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT jobs.job_id, jobs.params, jobs.started_at, COUNT(job_ads.ad_id) AS ad_count "
+                "FROM jobs LEFT JOIN job_ads ON job_ads.job_id = jobs.job_id "
+                "GROUP BY jobs.job_id ORDER BY jobs.started_at DESC"
+            ).fetchall()
+        return [{**dict(row), 'params': json.loads(row['params'])} for row in rows]
+
+    def count(self):
+        """Get the number of stored ads."""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM ads").fetchone()[0]
+
+    def _ad_row(self, item, raw, now):
+        """Build the _UPSERT_AD parameters of a processed ad."""
+        demographics = item.get('demographics')
+        return [item.get(name) for name in _AD_FIELDS] + [
+            demographics.astype(DEMOGRAPHIC_DTYPE).tobytes() if demographics is not None else None,
+            json.dumps(raw) if raw is not None else None,
+            now,
+            now
+        ]
+
+    def _link_job(self, data, job_id):
+        """Link ads to a job. Call with the lock held, inside a transaction."""
+        if job_id:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO job_ads (job_id, ad_id) VALUES (?, ?)",
+                ((job_id, item.get('id')) for item in data)
+            )
+
+    def _get_stored_values(self, ids):
+        """Get the stored ad fields and demographics blob of the given ids. Call with the lock held."""
+        stored = {}
+        for start in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[start:start + _LOOKUP_CHUNK]
+            rows = self._connection.execute(
+                f"SELECT {', '.join(_AD_FIELDS)}, demographics FROM ads "
+                f"WHERE id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in rows:
+                stored[row['id']] = tuple(row)
+        return stored
+
+    def _row_to_ad(self, row):
+        """Convert a database row back into a processed ad dict."""
+        ad = {name: row[name] for name in _AD_FIELDS}
+        blob = row['demographics']
+        ad['demographics'] = demographic_from_bytes(blob) if blob is not None else None
+        return ad
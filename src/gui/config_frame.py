@@ -3,6 +3,8 @@ Configuration frame for the Meta Ads Library Scraper.
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
+import queue
+import threading
 import webbrowser
 from src.utils.config import get_api_token, save_api_token
 from src.api.auth import AuthManager
@@ -11,12 +13,16 @@ from src.gui.styles import COLORS, FONTS, PADDING, BUTTON_STYLES, ENTRY_STYLES,
 class ConfigFrame(ttk.Frame):
     """Frame for API configuration settings."""
 
+    # Milliseconds between checks for the token validation result
+    POLL_INTERVAL = 100
+
     def __init__(self, parent, auth_manager=None):
         """Initialize the configuration frame."""
         super().__init__(parent, padding=PADDING["medium"], style="Card.TFrame")
 
         self.parent = parent
         self.auth_manager = auth_manager or AuthManager()
+        self._validation_results = queue.Queue()
 
         self._create_widgets()
         self._layout_widgets()
@@ -172,7 +178,7 @@ class ConfigFrame(ttk.Frame):
             background=COLORS["card_bg"]
         )
 
-        self.max_results_var = tk.StringVar(value="1000")
+        self.max_results_var = tk.StringVar(value="")
         self.max_results_entry = ttk.Entry(
             self.advanced_frame,
             textvariable=self.max_results_var,
@@ -180,6 +186,14 @@ class ConfigFrame(ttk.Frame):
             font=FONTS["normal"]
         )
 
+        self.max_results_help = ttk.Label(
+            self.advanced_frame,
+            text="Leave empty to fetch every matching ad",
+            font=FONTS["small"],
+            foreground=COLORS["light_text"],
+            background=COLORS["card_bg"]
+        )
+
         # Status indicator
         self.status_frame = ttk.Frame(self, style="Card.TFrame")
 
@@ -235,6 +249,7 @@ class ConfigFrame(ttk.Frame):
 
         self.max_results_label.grid(row=2, column=0, sticky="w", pady=PADDING["small"])
         self.max_results_entry.grid(row=2, column=1, sticky="w", pady=PADDING["small"])
+        self.max_results_help.grid(row=3, column=1, sticky="w", pady=(0, PADDING["small"]))
 
         # Status indicator
         self.status_frame.grid(row=4, column=0, sticky="ew", pady=PADDING["large"])
@@ -286,13 +301,27 @@ class ConfigFrame(ttk.Frame):
             text="Validating...",
             foreground=COLORS["secondary"]
         )
-        self.update_idletasks()
+        self.validate_token_button.config(state="disabled")
 
         # Set the token in the auth manager
         self.auth_manager.set_token(token)
 
-        # Validate the token
-        is_valid = self.auth_manager.validate_token()
+        # Validate the token in the background so the window stays responsive
+        threading.Thread(
+            target=lambda: self._validation_results.put(self.auth_manager.validate_token()),
+            daemon=True
+        ).start()
+        self.after(self.POLL_INTERVAL, self._poll_validation)
+
+    def _poll_validation(self):
+        """Show the token validation result once the worker has finished."""
+        try:
+            is_valid = self._validation_results.get_nowait()
+        except queue.Empty:
+            self.after(self.POLL_INTERVAL, self._poll_validation)
+            return
+
+        self.validate_token_button.config(state="normal")
 
         if is_valid:
             self.status_indicator.config(
@@ -4,10 +4,11 @@ Main window for the Meta Ads Library Scraper.
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
-from src.utils.config import UI_TITLE, UI_WIDTH, UI_HEIGHT, get_api_token
+from src.utils.config import UI_TITLE, UI_WIDTH, UI_HEIGHT, STORE_ENABLED, get_api_token
 from src.api.auth import AuthManager
 from src.api.client import APIClient
 from src.data.processor import DataProcessor
+from src.data.store import AdStore
 from src.gui.search_frame import SearchFrame
 from src.gui.config_frame import ConfigFrame
 from src.gui.results_frame import ResultsFrame
@@ -260,8 +261,11 @@ class MainWindow:
         # Create API client
         self.api_client = APIClient(self.auth_manager)
 
-        # Create data processor
-        self.data_processor = DataProcessor()
+        # Create data processor; pages are processed as they arrive, raw payloads are not kept
+        self.data_processor = DataProcessor(keep_raw=False)
+
+        # Create local ad store
+        self.ad_store = AdStore() if STORE_ENABLED else None
 
     def _create_widgets(self):
         """Create the widgets for the main window."""
@@ -290,7 +294,10 @@ class MainWindow:
             self.notebook,
             self.api_client,
             self.data_processor,
-            self._on_search_complete
+            self._on_search_complete,
+            get_max_results=lambda: self.config_frame.max_results_var.get(),
+            on_search_page=self._on_search_page,
+            ad_store=self.ad_store
         )
 
         self.config_frame = ConfigFrame(
@@ -357,10 +364,18 @@ class MainWindow:
             self.auth_manager.set_token(token)
             self.status_label.config(text="API token loaded from configuration")
 
+    def _on_search_page(self, page, search_params, page_number):
+        """Show a page of results while the search is running."""
+        if page_number == 1:
+            self.results_frame.update_results(list(page), search_params)
+        else:
+            self.results_frame.append_results(page)
+
     def _on_search_complete(self, data, search_params):
         """Handle search completion."""
-        # Update results frame
-        self.results_frame.update_results(data, search_params)
+        # Update results frame, unless every page was already streamed into it
+        if len(self.results_frame.current_data) != len(data):
+            self.results_frame.update_results(data, search_params)
 
         # Update status
         self.status_label.config(text=f"Found {len(data)} ads matching your criteria")
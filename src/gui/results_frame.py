@@ -3,12 +3,25 @@ Results frame for the Meta Ads Library Scraper.
 """
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import os
 import webbrowser
 from src.data.excel_export import ExcelExporter
-from src.gui.styles import COLORS, FONTS, PADDING, BUTTON_STYLES, ENTRY_STYLES, FRAME_STYLES, LABEL_STYLES
+from src.data.parquet_export import ParquetExporter
+from src.gui.styles import COLORS, FONTS, PADDING, BUTTON_STYLES, ENTRY_STYLES, FRAME_STYLES, LABEL_STYLES, TREEVIEW_STYLES
 
 class ResultsFrame(ttk.Frame):
-    """Frame for displaying search results."""
+    """
+    Frame for displaying search results.
+    
+    The results table is virtualized: it holds a fixed pool of Treeview rows
+    sized to the visible area and refills them from current_data as the user
+    scrolls, so its cost does not grow with the number of results.
+    """
+    
+    # Rows shown before the table has been laid out
+    VISIBLE_ROWS = 20
+    # Rows moved per mouse wheel step
+    WHEEL_ROWS = 3
     
     def __init__(self, parent):
         """Initialize the results frame."""
@@ -19,6 +32,13 @@ class ResultsFrame(ttk.Frame):
         self.current_search_params = {}
         self.excel_exporter = ExcelExporter()
         
+        # Virtual table state
+        self.row_ids = []
+        self.first_row = 0
+        self.selected_index = None
+        self.sort_column = None
+        self.sort_descending = False
+        
         self._create_widgets()
         self._layout_widgets()
     
@@ -72,12 +92,12 @@ class ResultsFrame(ttk.Frame):
             columns=self.tree_columns,
             show="headings",
             selectmode="browse",
-            height=20
+            height=self.VISIBLE_ROWS
         )
         
         # Configure columns and headings
         for col in self.tree_columns:
-            self.tree.heading(col, text=self.tree_headings[col])
+            self.tree.heading(col, text=self.tree_headings[col], command=lambda c=col: self._sort_by(c))
             
             # Set column widths
             if col == "ad_creative_body":
@@ -87,22 +107,33 @@ class ResultsFrame(ttk.Frame):
             else:
                 self.tree.column(col, width=100, stretch=False)
         
-        # Add scrollbars
+        # Add scrollbars; the vertical one scrolls the data window, not the Treeview
         self.vsb = ttk.Scrollbar(
             self.table_frame, 
             orient="vertical", 
-            command=self.tree.yview
+            command=self._on_scrollbar
         )
         self.hsb = ttk.Scrollbar(
             self.table_frame, 
             orient="horizontal", 
             command=self.tree.xview
         )
-        self.tree.configure(yscrollcommand=self.vsb.set, xscrollcommand=self.hsb.set)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self._resize_row_pool(self.VISIBLE_ROWS)
         
         # Bind double-click to open ad
         self.tree.bind("<Double-1>", self._on_item_double_click)
         
+        # Scrolling and resizing move or resize the data window
+        self.tree.bind("<Configure>", self._on_tree_configure)
+        self.tree.bind("<MouseWheel>", lambda event: self._scroll_rows(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS))
+        self.tree.bind("<Button-4>", lambda event: self._scroll_rows(-self.WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda event: self._scroll_rows(self.WHEEL_ROWS))
+        self.tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self._scroll_rows(-len(self.row_ids)))
+        self.tree.bind("<Next>", lambda event: self._scroll_rows(len(self.row_ids)))
+        
         # Details frame
         self.details_frame = ttk.LabelFrame(
             self,
@@ -175,10 +206,10 @@ class ResultsFrame(ttk.Frame):
         """Update the results with new data."""
         self.current_data = data
         self.current_search_params = search_params
-        
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.first_row = 0
+        self.selected_index = None
+        self.sort_column = None
+        self.sort_descending = False
         
         # Update count label
         if data:
@@ -188,36 +219,156 @@ class ResultsFrame(ttk.Frame):
             self.count_label.config(text="No results to display")
             self.export_button.config(state="disabled")
         
-        # Add data to treeview
-        for i, item in enumerate(data):
-            # Truncate ad text for display
-            ad_text = item.get("ad_creative_body", "")
-            if len(ad_text) > 100:
-                ad_text = ad_text[:97] + "..."
-            
-            # Format values for display
-            values = [
-                item.get("page_name", ""),
-                ad_text,
-                item.get("start_date", ""),
-                item.get("spend", ""),
-                item.get("impressions", ""),
-                item.get("platforms", "")
-            ]
-            
-            # Insert into treeview with the item's index as the iid
-            self.tree.insert("", "end", iid=str(i), values=values)
+        self._refresh_rows()
     
-    def _on_item_select(self, event):
-        """Handle item selection in the treeview."""
-        selection = self.tree.selection()
-        if not selection:
+    def append_results(self, data):
+        """Append rows to the current results, e.g. a page arriving during a search."""
+        if not data:
             return
         
-        # Get the selected item's index
-        index = int(selection[0])
+        self.current_data.extend(data)
+        if self.sort_column is not None:
+            # Keep the chosen order; row positions change, so drop the selection
+            self.current_data.sort(key=self._sort_key(self.sort_column), reverse=self.sort_descending)
+            self.selected_index = None
+        
+        self.count_label.config(text=f"Displaying {len(self.current_data)} results")
+        self.export_button.config(state="normal")
+        self._refresh_rows()
+    
+    def _sort_by(self, col):
+        """Sort the results by a column; clicking the same heading again reverses the order."""
+        if not self.current_data:
+            return
+        
+        if col == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = col
+            self.sort_descending = False
+        
+        self.current_data.sort(key=self._sort_key(col), reverse=self.sort_descending)
+        self.first_row = 0
+        self.selected_index = None
+        self._refresh_rows()
+    
+    def _sort_key(self, col):
+        """Get the sort key function of a column."""
+        if col in ("spend", "impressions"):
+            # Sort on the numeric bounds rather than the display string
+            def sort_key(item):
+                lower = item.get(f"{col}_lower")
+                upper = item.get(f"{col}_upper")
+                return (lower if lower is not None else -1, upper if upper is not None else -1)
+        else:
+            def sort_key(item):
+                return str(item.get(col) or "").lower()
+        return sort_key
+    
+    def _format_row(self, item):
+        """Format an ad for display in the table."""
+        # Truncate ad text for display
+        ad_text = item.get("ad_creative_body", "")
+        if len(ad_text) > 100:
+            ad_text = ad_text[:97] + "..."
+        
+        return [
+            item.get("page_name", ""),
+            ad_text,
+            item.get("start_date", ""),
+            item.get("spend", ""),
+            item.get("impressions", ""),
+            item.get("platforms", "")
+        ]
+    
+    def _resize_row_pool(self, row_count):
+        """Create or drop pooled Treeview rows so the pool matches the visible area."""
+        row_count = max(1, row_count)
+        while len(self.row_ids) < row_count:
+            self.row_ids.append(self.tree.insert("", "end", iid=f"row{len(self.row_ids)}"))
+        while len(self.row_ids) > row_count:
+            self.tree.delete(self.row_ids.pop())
+    
+    def _refresh_rows(self):
+        """Fill the pooled rows with the data window starting at first_row."""
+        max_first = max(0, len(self.current_data) - len(self.row_ids))
+        self.first_row = min(max(0, self.first_row), max_first)
+        
+        self.tree.selection_set(())
+        for position, iid in enumerate(self.row_ids):
+            index = self.first_row + position
+            if index < len(self.current_data):
+                self.tree.item(iid, values=self._format_row(self.current_data[index]))
+                self.tree.move(iid, "", position)
+                if index == self.selected_index:
+                    self.tree.selection_set(iid)
+            else:
+                self.tree.detach(iid)
+        
+        # Reflect the data window on the scrollbar
+        total = len(self.current_data)
+        if total:
+            self.vsb.set(self.first_row / total, min(1.0, (self.first_row + len(self.row_ids)) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+    
+    def _on_tree_configure(self, event):
+        """Resize the row pool when the table's height changes."""
+        heading_height = TREEVIEW_STYLES["rowheight"]
+        row_count = max(1, (event.height - heading_height) // TREEVIEW_STYLES["rowheight"])
+        if row_count != len(self.row_ids):
+            self._resize_row_pool(row_count)
+            self._refresh_rows()
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Handle the vertical scrollbar."""
+        if action == "moveto":
+            self.first_row = int(float(amount) * len(self.current_data))
+            self._refresh_rows()
+        elif action == "scroll":
+            step = len(self.row_ids) if unit == "pages" else 1
+            self._scroll_rows(int(amount) * step)
+    
+    def _scroll_rows(self, rows):
+        """Move the data window by the given number of rows."""
+        self.first_row += rows
+        self._refresh_rows()
+        return "break"
+    
+    def _move_selection(self, rows):
+        """Move the selection with the keyboard, scrolling the window when needed."""
+        if not self.current_data:
+            return "break"
+        
+        index = 0 if self.selected_index is None else self.selected_index + rows
+        index = min(max(0, index), len(self.current_data) - 1)
+        self.selected_index = index
+        
+        # Keep the selected row inside the window
+        if index < self.first_row:
+            self.first_row = index
+        elif index >= self.first_row + len(self.row_ids):
+            self.first_row = index - len(self.row_ids) + 1
+        self._refresh_rows()
+        return "break"
+    
+    def _selected_data_index(self):
+        """Get the index in current_data of the selected row, or None."""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.row_ids:
+            return None
+        
+        index = self.first_row + self.row_ids.index(selection[0])
         if index < 0 or index >= len(self.current_data):
+            return None
+        return index
+    
+    def _on_item_select(self, event):
+        """Handle item selection in the treeview."""
+        index = self._selected_data_index()
+        if index is None:
             return
+        self.selected_index = index
         
         # Get the selected item's data
         item = self.current_data[index]
@@ -255,13 +406,8 @@ class ResultsFrame(ttk.Frame):
     
     def _open_selected_ad(self):
         """Open the selected ad in a browser."""
-        selection = self.tree.selection()
-        if not selection:
-            return
-        
-        # Get the selected item's index
-        index = int(selection[0])
-        if index < 0 or index >= len(self.current_data):
+        index = self._selected_data_index()
+        if index is None:
             return
         
         # Get the ad URL
@@ -274,7 +420,7 @@ class ResultsFrame(ttk.Frame):
         webbrowser.open(ad_url)
     
     def _export_to_excel(self):
-        """Export the current results to Excel."""
+        """Export the current results to Excel, Parquet or Arrow."""
         if not self.current_data:
             messagebox.showerror("Error", "No data to export")
             return
@@ -282,20 +428,34 @@ class ResultsFrame(ttk.Frame):
         # Ask for save location
         file_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")],
-            title="Save Excel File"
+            filetypes=[
+                ("Excel files", "*.xlsx"),
+                ("Parquet files", "*.parquet"),
+                ("Arrow IPC files", "*.arrow"),
+                ("All files", "*.*")
+            ],
+            title="Save Export File"
         )
         
         if not file_path:
             return  # User cancelled
         
         try:
-            # Export data
-            self.excel_exporter.export_to_excel(
-                self.current_data,
-                self.current_search_params,
-                file_path
-            )
+            extension = os.path.splitext(file_path)[1].lower()
+            if extension in (".parquet", ".arrow"):
+                # Columnar export writes the demographics and parameters tables alongside
+                ParquetExporter(extension[1:]).export(
+                    self.current_data,
+                    self.current_search_params,
+                    file_path
+                )
+            else:
+                # Export data row by row, splitting it if it exceeds Excel's row limit
+                self.excel_exporter.export_sharded(
+                    self.current_data,
+                    self.current_search_params,
+                    file_path
+                )
             
             messagebox.showinfo("Success", f"Data exported successfully to {file_path}")
             
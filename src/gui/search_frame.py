@@ -4,13 +4,22 @@ Search frame for the Meta Ads Library Scraper.
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
+import time
+import queue
+import threading
 from datetime import datetime, timedelta
+from src.utils.config import FIELD_PROFILES, DEFAULT_FIELD_PROFILE
+from src.data.pipeline import PagePipeline
 from src.gui.styles import COLORS, FONTS, PADDING, BUTTON_STYLES, ENTRY_STYLES, FRAME_STYLES, LABEL_STYLES
 
 class SearchFrame(ttk.Frame):
     """Frame for search parameters and filters."""
 
-    def __init__(self, parent, api_client, data_processor, on_search_complete=None):
+    # Milliseconds between checks for progress messages from the search worker
+    POLL_INTERVAL = 100
+
+    def __init__(self, parent, api_client, data_processor, on_search_complete=None, get_max_results=None,
+                 on_search_page=None, ad_store=None):
         """Initialize the search frame."""
         super().__init__(parent, padding=PADDING["medium"], style="Card.TFrame")
 
@@ -18,6 +27,14 @@ class SearchFrame(ttk.Frame):
         self.api_client = api_client
         self.data_processor = data_processor
         self.on_search_complete = on_search_complete
+        self.get_max_results = get_max_results
+        self.on_search_page = on_search_page
+        self.ad_store = ad_store
+
+        # Background search state
+        self._worker = None
+        self._cancel_event = threading.Event()
+        self._messages = queue.Queue()
 
         # Search parameters
         self.search_params = {
@@ -199,6 +216,30 @@ class SearchFrame(ttk.Frame):
             font=FONTS["normal"]
         )
 
+        # Field profile
+        self.fields_label = ttk.Label(
+            self,
+            text="Fields:",
+            font=FONTS["normal"],
+            background=COLORS["card_bg"]
+        )
+        self.fields_var = tk.StringVar(value=DEFAULT_FIELD_PROFILE)
+        self.fields_combo = ttk.Combobox(
+            self,
+            textvariable=self.fields_var,
+            values=list(FIELD_PROFILES),
+            state="readonly",
+            width=15,
+            font=FONTS["normal"]
+        )
+        self.fields_help = ttk.Label(
+            self,
+            text="Smaller profiles fetch faster: minimal, spend, creatives or full",
+            font=FONTS["small"],
+            foreground=COLORS["light_text"],
+            background=COLORS["card_bg"]
+        )
+
         # Search button
         self.search_button = ttk.Button(
             self,
@@ -208,6 +249,16 @@ class SearchFrame(ttk.Frame):
             padding=[PADDING["medium"], PADDING["small"]]
         )
 
+        # Cancel button
+        self.cancel_button = ttk.Button(
+            self,
+            text="Cancel",
+            command=self.cancel_search,
+            state="disabled",
+            style="Secondary.TButton",
+            padding=[PADDING["medium"], PADDING["small"]]
+        )
+
         # Results count
         self.results_label = ttk.Label(
             self,
@@ -259,17 +310,26 @@ class SearchFrame(ttk.Frame):
         self.status_label.grid(row=9, column=0, sticky="w", pady=(PADDING["small"], 0))
         self.status_combo.grid(row=9, column=1, sticky="w", pady=(PADDING["small"], PADDING["medium"]))
 
-        # Search button
-        self.search_button.grid(row=10, column=0, columnspan=2, pady=PADDING["large"], sticky="ew", padx=PADDING["xlarge"])
+        # Field profile
+        self.fields_label.grid(row=10, column=0, sticky="w", pady=(PADDING["small"], 0))
+        self.fields_combo.grid(row=10, column=1, sticky="w", pady=(PADDING["small"], 0))
+        self.fields_help.grid(row=11, column=1, sticky="w", pady=(0, PADDING["medium"]))
+
+        # Search and cancel buttons
+        self.search_button.grid(row=12, column=0, columnspan=2, pady=(PADDING["large"], PADDING["small"]), sticky="ew", padx=PADDING["xlarge"])
+        self.cancel_button.grid(row=13, column=0, columnspan=2, pady=(0, PADDING["large"]), sticky="ew", padx=PADDING["xlarge"])
 
         # Results count
-        self.results_label.grid(row=11, column=0, columnspan=2, sticky="w", pady=PADDING["small"])
+        self.results_label.grid(row=14, column=0, columnspan=2, sticky="w", pady=PADDING["small"])
 
         # Configure grid
         self.columnconfigure(1, weight=1)
 
     def execute_search(self):
-        """Execute the search with the current parameters."""
+        """Start the search with the current parameters in a background worker."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+
         try:
             # Update search parameters from UI
             self.search_params["search_terms"] = self.search_terms_entry.get()
@@ -295,33 +355,160 @@ class SearchFrame(ttk.Frame):
             # Get ad status
             self.search_params["ad_active_status"] = self.status_var.get()
 
+            # Request only the fields of the selected profile
+            self.search_params["fields"] = FIELD_PROFILES[self.fields_var.get()]
+
             # Validate dates
             self._validate_dates()
 
-            # Show searching message
-            self.results_label.config(text="Searching... Please wait.")
-            self.update_idletasks()
+            max_results = self._get_max_results()
 
-            # Execute search
-            results = self.api_client.search_ads(self.search_params)
+        except ValueError as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+
+        # Show searching message
+        self.results_label.config(text="Searching... Please wait.")
+        self.search_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+
+        # Run the search off the Tk event loop; widgets are only touched from _poll_messages
+        self._cancel_event.clear()
+        self._worker = threading.Thread(
+            target=self._run_search,
+            args=(dict(self.search_params), max_results),
+            daemon=True
+        )
+        self._worker.start()
+        self.after(self.POLL_INTERVAL, self._poll_messages)
+
+    def cancel_search(self):
+        """Stop the running search once the request in flight, if any, returns."""
+        if self._worker is not None and self._worker.is_alive():
+            self._cancel_event.set()
+            self.cancel_button.config(state="disabled")
+            self.results_label.config(text="Cancelling search...")
+
+    def _run_search(self, search_params, max_results):
+        """Fetch and process the search results page by page. Runs in the worker thread."""
+        try:
+            start_time = time.monotonic()
+            self.data_processor.reset()
+            self.data_processor.set_fields(search_params.get("fields"))
+
+            # Keep every fetched page in the local store as well
+            sinks = []
+            if self.ad_store is not None:
+                self.ad_store.start_job(search_params)
+                sinks.append(self.ad_store)
+            pipeline = PagePipeline(self.data_processor, sinks)
+
+            # Cancelling also interrupts waits for the rate budget and retry backoffs
+            pages = self.api_client.iter_pages(search_params, cancel_event=self._cancel_event)
+            for processed_page in pipeline.run(pages, max_results):
+                self._messages.put(("page", processed_page, pipeline.page_count))
+                if max_results is not None and pipeline.ad_count >= max_results:
+                    break
+
+                self._messages.put((
+                    "progress",
+                    self._progress_text(pipeline.page_count, pipeline.ad_count, start_time, max_results)
+                ))
+                if self._cancel_event.is_set():
+                    break
+
+            capped = max_results is not None and pipeline.ad_count >= max_results
+            self._messages.put(("done", self.data_processor.get_all_data(), self._cancel_event.is_set(), capped))
 
-            # Process results
-            processed_data = self.data_processor.process_ads_data(results)
+        except ValueError as e:
+            self._messages.put(("error", "Input Error", str(e)))
+        except Exception as e:
+            self._messages.put(("error", "Search Error", f"An error occurred: {str(e)}"))
 
-            # Update results label
-            self.results_label.config(
-                text=f"Found {len(processed_data)} ads matching your criteria."
-            )
+    def _progress_text(self, page_count, ad_count, start_time, max_results):
+        """Describe the progress of a running search."""
+        elapsed = time.monotonic() - start_time
+        parts = [f"Fetched {page_count} pages, {ad_count} ads"]
 
-            # Call the callback if provided
-            if self.on_search_complete:
-                self.on_search_complete(processed_data, self.search_params)
+        usage = self.api_client.rate_controller.usage
+        if usage is not None:
+            parts.append(f"API usage {usage:.0f}%")
 
-        except ValueError as e:
-            messagebox.showerror("Input Error", str(e))
-        except Exception as e:
-            messagebox.showerror("Search Error", f"An error occurred: {str(e)}")
-            self.results_label.config(text="Search failed. See error message.")
+        # The API does not report a total, so an ETA is only known with a result limit
+        if max_results and ad_count and elapsed > 0:
+            remaining = max(0, max_results - ad_count) * elapsed / ad_count
+            parts.append(f"ETA {int(remaining // 60)}:{int(remaining % 60):02d}")
+        elif elapsed > 0:
+            parts.append(f"{ad_count / elapsed:.0f} ads/s")
+
+        return " | ".join(parts) + "..."
+
+    def _poll_messages(self):
+        """Apply messages from the search worker on the Tk thread."""
+        try:
+            while True:
+                message = self._messages.get_nowait()
+                kind = message[0]
+
+                if kind == "progress":
+                    self.results_label.config(text=message[1])
+
+                elif kind == "page":
+                    # Show results while the search is still running
+                    _, processed_page, page_number = message
+                    if self.on_search_page:
+                        self.on_search_page(processed_page, self.search_params, page_number)
+
+                elif kind == "done":
+                    _, processed_data, cancelled, capped = message
+                    self._finish_search()
+
+                    # Update results label
+                    if cancelled:
+                        text = f"Search cancelled. Showing {len(processed_data)} ads fetched so far."
+                    elif capped:
+                        text = (f"Showing the first {len(processed_data)} ads: the Max Results limit was reached. "
+                                "Clear Max Results in Config to fetch every matching ad.")
+                    else:
+                        text = f"Found {len(processed_data)} ads matching your criteria."
+                    self.results_label.config(text=text)
+
+                    # Call the callback if provided
+                    if self.on_search_complete:
+                        self.on_search_complete(processed_data, self.search_params)
+                    return
+
+                elif kind == "error":
+                    _, title, text = message
+                    self._finish_search()
+                    messagebox.showerror(title, text)
+                    self.results_label.config(text="Search failed. See error message.")
+                    return
+
+        except queue.Empty:
+            pass
+
+        self.after(self.POLL_INTERVAL, self._poll_messages)
+
+    def _finish_search(self):
+        """Restore the buttons after the worker finished."""
+        self._worker = None
+        self.search_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+    def _get_max_results(self):
+        """Get the configured maximum number of results, or None for no limit."""
+        if not self.get_max_results:
+            return None
+
+        value = str(self.get_max_results()).strip()
+        if not value:
+            return None
+        try:
+            max_results = int(value)
+        except ValueError:
+            raise ValueError("Max Results must be a whole number")
+        return max_results if max_results > 0 else None
 
     def _validate_dates(self):
         """Validate the date inputs."""
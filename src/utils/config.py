@@ -11,14 +11,94 @@ load_dotenv()
 API_VERSION = "v19.0"  # Current Meta API version
 API_BASE_URL = f"https://graph.facebook.com/{API_VERSION}/ads_archive"
 
+# Named sets of fields requested from the API; smaller sets mean smaller, faster pages
+FIELD_PROFILES = {
+    "minimal": "page_id,page_name,ad_snapshot_url,ad_delivery_start_time,ad_delivery_stop_time",
+    "spend": "page_id,page_name,ad_delivery_start_time,ad_delivery_stop_time,currency,spend,impressions",
+    "creatives": "page_id,page_name,ad_snapshot_url,ad_creative_bodies,ad_delivery_start_time,ad_delivery_stop_time,publisher_platforms,bylines",
+    "full": "page_id,page_name,ad_snapshot_url,ad_creative_bodies,ad_delivery_start_time,ad_delivery_stop_time,currency,spend,impressions,demographic_distribution,publisher_platforms,bylines"
+}
+DEFAULT_FIELD_PROFILE = "full"
+
 # Default search parameters
 DEFAULT_SEARCH_PARAMS = {
     "ad_type": "POLITICAL_AND_ISSUE_ADS",
     "ad_reached_countries": ["US"],
     "ad_active_status": "ACTIVE",
-    "fields": "page_id,page_name,ad_snapshot_url,ad_creative_bodies,ad_delivery_start_time,ad_delivery_stop_time,currency,spend,impressions,demographic_distribution,publisher_platforms,bylines"
+    "fields": FIELD_PROFILES[DEFAULT_FIELD_PROFILE]
 }
 
+# Local application data (checkpoints, caches)
+APP_DATA_DIR = os.getenv("META_ADS_DATA_DIR", os.path.join(os.path.expanduser("~"), ".meta_ads_scraper"))
+CHECKPOINT_DIR = os.path.join(APP_DATA_DIR, "checkpoints")
+
+# Response cache for repeated searches
+CACHE_DIR = os.path.join(APP_DATA_DIR, "cache")
+CACHE_ENABLED = True  # Serve repeated page requests from the local cache
+CACHE_TTL = 3600  # Seconds a cached page stays valid
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # Size budget before least recently used pages are evicted
+
+# Local SQLite store of every fetched ad
+STORE_PATH = os.path.join(APP_DATA_DIR, "ads.db")
+STORE_ENABLED = True  # Upsert search results into the local store
+STORE_RAW_JSON = True  # Keep the raw API payload of each ad in the store
+SYNC_OVERLAP_DAYS = 7  # Days before the last seen start date that a delta sync fetches again
+
+# HTTP connection settings shared by the API client and token validation
+HTTP_POOL_SIZE = 10  # Connections kept open per host
+HTTP_MAX_RETRIES = 3  # Transport-level retries for dropped connections and gateway errors
+HTTP_BACKOFF_FACTOR = 0.5  # Seconds multiplied between transport retries
+HTTP_TIMEOUT = (10, 60)  # (connect, read) timeouts in seconds
+HTTP_KEEP_ALIVE = True  # Reuse TCP/TLS connections between requests
+HTTP_GZIP = True  # Ask the API for gzip-compressed responses
+
+# Request pacing, adapted at runtime from the API usage headers
+REQUEST_INTERVAL = 0.5  # Initial seconds between requests across all workers
+RATE_MIN_INTERVAL = 0.1  # Fastest pacing when usage is low
+RATE_MAX_INTERVAL = 30.0  # Slowest pacing when usage approaches the limit
+RATE_TARGET_USAGE = 75  # Usage percentage above which requests slow down
+RATE_CRITICAL_USAGE = 95  # Usage percentage at which requests pause
+RATE_INCREASE_STEP = 0.2  # Requests per second added after a low-usage response
+RATE_THROTTLE_COOLDOWN = 60  # Seconds to pause after a throttled request
+
+# Retry policy for failed requests
+RETRY_MAX_ATTEMPTS = 5  # Attempts per page before giving up
+RETRY_BASE_DELAY = 1.0  # Seconds before the first retry, doubled on every attempt
+RETRY_MAX_DELAY = 60.0  # Upper bound for the delay between attempts
+
+# Adaptive page size of paginated searches
+PAGE_SIZE_ADAPTIVE = True  # Tune the limit of each page request instead of using the API default
+PAGE_SIZE_INITIAL = 500  # Limit of the first page
+PAGE_SIZE_MIN = 25  # Smallest limit the page size shrinks to
+PAGE_SIZE_MAX = 1000  # Largest limit the page size grows to
+PAGE_SIZE_GROW_AFTER = 5  # Successful pages in a row before the limit grows
+PAGE_SIZE_GROW_FACTOR = 1.5  # Factor applied to the limit when it grows
+PAGE_SIZE_SHRINK_FACTOR = 0.5  # Factor applied to the limit after a too-large page or a timeout
+
+# JSON decoding of API responses
+JSON_DECODER = os.getenv("META_ADS_JSON_DECODER", "auto")  # "auto", "orjson", "msgspec", "typed" or "json"
+
+# Sharded search settings
+SHARD_DAYS = 30  # Days covered by each date shard
+SHARD_MAX_WORKERS = 4  # Shards fetched concurrently
+
+# Batch job settings
+BATCH_MAX_WORKERS = 4  # Queries of a batch fetched concurrently, sharing one rate budget
+
+# Cross-query deduplication
+DEDUP_BLOOM_CAPACITY = 10000000  # Ids the Bloom filter of an on-disk dedup index is sized for
+DEDUP_BLOOM_ERROR_RATE = 0.001  # False positive rate of that Bloom filter at capacity
+
+# Async client settings
+ASYNC_MAX_CONCURRENCY = 8  # Requests in flight at once on the event loop
+
+# Export settings
+EXPORT_WIDTH_SAMPLE_ROWS = 1000  # Rows sampled to size columns in streaming Excel exports
+EXCEL_MAX_DATA_ROWS = 1048575  # Excel's row limit minus the header row
+EXCEL_SHARD_MODE = "sheets"  # Split large exports into numbered "sheets" or "files"
+PARQUET_ROW_GROUP_SIZE = 50000  # Rows per Parquet row group / Arrow record batch
+PARQUET_COMPRESSION = "zstd"  # Compression codec for Parquet and Arrow files
+
 # UI Configuration
 UI_TITLE = "Meta Ads Library Scraper"
 UI_WIDTH = 1200